@@ -1,33 +1,55 @@
 from functools import partial
 from typing import Any
 
-import numpy as np
 import pandas as pd
 from backtesting import Backtest, Strategy
-from hyperopt import STATUS_OK, fmin, hp, space_eval, tpe
-from sklearn.model_selection import KFold
+from hyperopt import STATUS_OK, Trials, hp, space_eval
 
+from src.analysis.cross_validation import cross_validate, reduce_stats
+from src.analysis.parallel import map_tickers
+from src.analysis.prepared import PreparedDataset, get_panel
+from src.analysis.vectorised import run as run_vectorised
+from src.db.cache import ArrowCache
 from src.db.main import DatabaseApi
-from src.time_db.schemas import Daily, daily_to_backtest
+from src.time_db.panel import Panel
+from src.time_db.schemas import Daily
 from strategies import daily
-from utils import gen
+from utils.optimise import SuccessiveHalving, get_best, opt
 from utils.tickers import get_snp500_tickers
 
 
 def run(
-    data: Daily,
+    data: Daily | Panel | PreparedDataset,
     strategy: Strategy,
     params: dict[str, Any] | None = None,
+    n_jobs: int = 1,
     **kwargs,
 ):
+    """
+    Backtest a strategy on each ticker.
+
+    Parameters
+    ----------
+    data: Daily data, panel or prepared dataset of all tickers, prepare data once when running many backtests on it.
+    strategy: Strategy class.
+    params: Optional strategy parameters.
+    n_jobs: Number of worker processes (-1 for one per CPU), tickers are run in parallel when not 1. Only stats are
+        returned from workers, so no Backtest instances are returned.
+    kwargs: Additional arguments for Backtest.run.
+    """
     if params is not None:
         _ = strategy._check_params(strategy, params)
 
+    if n_jobs != 1:
+        # Parameters are passed explicitly, workers may not share the strategy class attributes set above
+        func = partial(run_backtest, strategy=strategy, **(params or {}), **kwargs)
+        return map_tickers(get_panel(data), func, n_jobs=n_jobs), {}
+
+    dataset = data if isinstance(data, PreparedDataset) else PreparedDataset(data)
+
     out, all_bt = {}, {}
-    for stock, stock_df in data.groupby(Daily.stock_id):
-        backtest_df = daily_to_backtest(stock_df)
-        backtest_df = backtest_df.dropna()
-        bt = Backtest(backtest_df, strategy, cash=1000, commission=0.002)
+    for stock, frame in dataset.items():
+        bt = Backtest(frame, strategy, cash=1000, commission=0.002)
 
         out[stock] = bt.run(**kwargs)
         all_bt[stock] = bt
@@ -35,30 +57,94 @@ def run(
     return out, all_bt
 
 
-def opt(obj_func, param_space: dict[str, Any], **kwargs):
-    return fmin(obj_func, param_space, algo=tpe.suggest, **kwargs)
+def run_backtest(data: pd.DataFrame, strategy: Strategy, **kwargs) -> pd.Series:
+    return Backtest(data, strategy, cash=1000, commission=0.002).run(**kwargs)
+
+
+def objective(params, strategy, data, vectorised: bool = False):
+    """
+    Loss of strategy parameters over all tickers, backtested with the vectorised engine if enabled (see
+    src.analysis.vectorised, signal strategies only), which gives the same stats without a Backtest per ticker.
+    """
+    stats = get_stats(params, strategy, data, vectorised=vectorised)
+    return {"loss": get_loss(stats), "status": STATUS_OK}
+
 
+def get_stats(params, strategy, data, vectorised: bool = False) -> pd.DataFrame:
+    """
+    Stats of strategy parameters, one row per ticker.
+    """
+    if vectorised:
+        return run_vectorised(data, strategy, params)
 
-def objective(params, strategy, data):
-    _ = strategy._check_params(strategy, params)
-    stats, _ = run(data=data, strategy=strategy)
-    stats = pd.DataFrame(stats).transpose()
+    stats, _ = run(data=data, strategy=strategy, params=params)
+    return pd.DataFrame(stats).transpose()
 
+
+def get_ticker_stats(params, tickers, strategy, data, vectorised: bool = False) -> pd.DataFrame:
+    """
+    Stats of strategy parameters on a subset of tickers of a panel or prepared dataset, for SuccessiveHalving.
+    """
+    return get_stats(params, strategy, data.select(tickers), vectorised=vectorised)
+
+
+def fit_fold(
+    data: PreparedDataset,
+    train_stocks: list[str],
+    test_stocks: list[str],
+    strategy: Strategy,
+    param_space: dict[str, Any],
+    max_evals: int = 10,
+    seed: int | None = None,
+    prune: bool = False,
+    vectorised: bool = False,
+) -> tuple[dict[str, Any], pd.DataFrame]:
+    """
+    Optimise strategy parameters on the train tickers and backtest the best parameters on the test tickers, for
+    cross_validate.
+
+    Parameters
+    ----------
+    data: Prepared dataset of all tickers.
+    train_stocks: Tickers to optimise on.
+    test_stocks: Tickers to backtest the best parameters on.
+    strategy: Strategy class.
+    param_space: Hyperopt search space of the strategy parameters.
+    max_evals: Number of optimisation trials.
+    seed: Random seed of the optimisation.
+    prune: Prune trials that score badly on a few tickers (see SuccessiveHalving).
+    vectorised: Optimise with the vectorised engine instead of Backtest (see objective).
+    """
+    train = data.select(train_stocks)
+
+    if prune:
+        evaluate = partial(get_ticker_stats, strategy=strategy, data=train, vectorised=vectorised)
+        obj_func = SuccessiveHalving(evaluate, get_loss, items=train_stocks, seed=seed)
+    else:
+        obj_func = partial(objective, strategy=strategy, data=train, vectorised=vectorised)
+
+    trials = Trials()
+    opt(obj_func, param_space=param_space, max_evals=max_evals, seed=seed, trials=trials, show_progressbar=False)
+    best_params = space_eval(param_space, get_best(trials))
+
+    stats, _ = run(data.select(test_stocks), strategy=strategy, params=best_params)
+    return best_params, pd.DataFrame(stats).transpose()
+
+
+def get_loss(stats: pd.DataFrame) -> float:
     ## Different functions for loss
     # loss = -(stats["Return [%]"] + 100).min()
     # loss = -stats["Return [%]"].sum()
     # loss = -stats["Sortino Ratio"].mean()
-    loss = -stats.loc[stats["# Trades"] > 0, "Sharpe Ratio"].mean()
     # loss = -(stats.loc[stats["# Trades"] > 0, "Max. Drawdown [%]"]).mean()
-
-    return {"loss": loss, "status": STATUS_OK}
+    return -stats.loc[stats["# Trades"] > 0, "Sharpe Ratio"].mean()
 
 
 if __name__ == "__main__":
-    api = DatabaseApi()
+    api = DatabaseApi(cache=ArrowCache())
     # stocks = EXAMPLE_STOCKS
     stocks = get_snp500_tickers()[:50]
-    data = api.request(stock=stocks, interval="1d", period="1y")
+    data = PreparedDataset(api.request(stock=stocks, interval="1d", period="1y"))
 
     # strategy = daily.SmaCross
 
@@ -84,37 +170,21 @@ if __name__ == "__main__":
     #     "threshold2": hp.uniform("threshold2", -1, 1)
     # }
 
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
-    all_stats, reduced_stats = {}, {}
-
-    i = 0
-    for train_id, test_id in kf.split(stocks):
-        train_stocks = np.array(stocks)[train_id]
-        test_stocks = np.array(stocks)[test_id]
-
-        obj_func = partial(objective, strategy=strategy, data=data[data[Daily.stock_id].isin(train_stocks)])
-
-        best = opt(obj_func, param_space=param_space, max_evals=10)
-
-        best_params = space_eval(param_space, best)
-        print(best_params)
-
-        stats, all_bt = run(data[data[Daily.stock_id].isin(test_stocks)], strategy=strategy, params=best_params)
-
-        all_stats[f"run{i}"] = stats
-
-        # TODO: Working reduction method needed
-        # Taking mean of numeric columns
-        # df_stats = pd.DataFrame(stats).transpose()
-        # df_stats = df_stats.apply(lambda x: pd.to_numeric(x, errors='ignore'))
-        # reduced_stats[f"run{i}"] = df_stats.loc[:, ~df_stats.columns.str.startswith("_")].mean()
-
-        i += 1
-
-    # reduced_stats = pd.concat(reduced_stats, axis=1)
-    # print(reduced_stats)
-
-    all_stats = gen.multiindex_from_dict(all_stats)
-    print(all_stats)
-    # for bt in all_bt.values():
-    #     bt.plot()
+    # Prune trials that score badly on a few tickers (see SuccessiveHalving)
+    prune = False
+    # Optimise with the vectorised engine rather than Backtest (signal strategies only)
+    vectorised = False
+
+    fit = partial(
+        fit_fold,
+        strategy=strategy,
+        param_space=param_space,
+        max_evals=10,
+        seed=42,
+        prune=prune,
+        vectorised=vectorised,
+    )
+    results = cross_validate(data, fit, n_splits=5, seed=42)
+
+    print(results)
+    print(reduce_stats(results))
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from src.time_db.schemas import Daily, nytz
+
+
+def fake_daily(n_tickers: int = 500, n_days: int = 252, end: str = "2022-08-03", seed: int = 42) -> pd.DataFrame:
+    """
+    Create a random walk long format Daily frame for benchmarks and tests, with one row per ticker per business day.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.bdate_range(end=end, periods=n_days, tz=nytz.tz)
+    tickers = [f"FAKE{i}" for i in range(n_tickers)]
+
+    shape = (n_tickers, n_days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=shape), axis=1))
+    spread = close * rng.uniform(0, 0.02, size=shape)
+
+    return pd.DataFrame(
+        {
+            Daily.stock_id: np.repeat(tickers, n_days),
+            Daily.timestamp: np.tile(timestamps, n_tickers),
+            Daily.open: (close + rng.uniform(-1, 1, size=shape) * spread / 2).ravel(),
+            Daily.high: (close + spread).ravel(),
+            Daily.low: (close - spread).ravel(),
+            Daily.close: close.ravel(),
+            Daily.adj_close: close.ravel(),
+            Daily.volume: rng.integers(1_000, 1_000_000, size=shape).ravel(),
+        }
+    )
@@ -0,0 +1,50 @@
+"""
+Ingest throughput of the INSERT and COPY paths, in rows per second.
+Writes to the configured database under FAKE tickers, which are removed afterwards.
+
+Usage: python -m benchmarks.ingest
+"""
+
+from time import perf_counter
+
+from sqlalchemy.orm import Session
+
+from benchmarks.data import fake_daily
+from src.time_db import crud, models
+from src.time_db.database import engine
+from src.time_db.schemas import Daily
+
+
+def clear(tickers: list[str]):
+    with Session(engine) as session:
+        session.query(models.Daily).filter(models.Daily.stock_id.in_(tickers)).delete()
+        session.query(models.Stock).filter(models.Stock.ticker.in_(tickers)).delete()
+        session.commit()
+
+
+def main(n_tickers: int = 50, n_days: int = 2520):
+    data = fake_daily(n_tickers=n_tickers, n_days=n_days)
+    tickers = data[Daily.stock_id].unique().tolist()
+
+    results = {}
+    for name, insert in {
+        "insert": lambda df: crud.create_records(models.Daily, df.to_dict("records")),
+        "copy": lambda df: crud.copy_records(models.Daily, df),
+    }.items():
+        clear(tickers)
+        crud.create_records(models.Stock, [{"ticker": ticker} for ticker in tickers])
+
+        start = perf_counter()
+        for _, stock_df in data.groupby(Daily.stock_id):
+            insert(stock_df)
+        results[name] = data.shape[0] / (perf_counter() - start)
+
+    clear(tickers)
+
+    print(f"{n_tickers} tickers x {n_days} days ({data.shape[0]} rows)")
+    for name, rate in results.items():
+        print(f"{name:>8}: {rate:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
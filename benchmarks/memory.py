@@ -0,0 +1,31 @@
+"""
+Memory used by a multi-year, multi-ticker load in the Daily and CompactDaily layouts, in total and per column.
+
+Usage: python -m benchmarks.memory
+"""
+
+import pandas as pd
+
+from benchmarks.data import fake_daily
+from src.time_db.schemas import compact_daily
+
+
+def main(n_tickers: int = 500, n_days: int = 1260):
+    data = fake_daily(n_tickers=n_tickers, n_days=n_days)
+    compact = compact_daily(data)
+
+    usage = pd.DataFrame(
+        {
+            "daily": data.memory_usage(deep=True, index=False),
+            "compact": compact.memory_usage(deep=True, index=False),
+        }
+    )
+    usage.loc["total"] = usage.sum()
+
+    print(f"{n_tickers} tickers x {n_days} days ({data.shape[0]} rows), MB")
+    print((usage / 2**20).round(1).to_string())
+    print(f"Compact layout uses {usage.loc['total', 'compact'] / usage.loc['total', 'daily']:.0%} of the memory")
+
+
+if __name__ == "__main__":
+    main()
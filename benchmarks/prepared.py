@@ -0,0 +1,66 @@
+"""
+Per trial time of backtesting a strategy on every ticker, when converting the data to backtest frames on each trial
+(from long format data as before panels, or from a panel) and when using frames prepared once for the optimisation.
+
+Usage: python -m benchmarks.prepared
+"""
+
+import warnings
+from time import perf_counter
+
+from backtesting import Backtest
+
+from benchmarks.data import fake_daily
+from src.analysis.prepared import PreparedDataset
+from src.time_db.panel import Panel
+from src.time_db.schemas import Daily, daily_to_backtest
+from strategies.daily import SmaCross
+
+
+def from_daily(data):
+    return {stock: daily_to_backtest(group.dropna()) for stock, group in data.groupby(Daily.stock_id)}
+
+
+def from_panel(data):
+    panel = Panel.from_daily(data)
+    return {stock: panel.to_backtest(stock) for stock in panel.tickers}
+
+
+def time_trial(get_frames, repeat: int) -> tuple[float, float]:
+    """Seconds per trial spent getting frames and in total"""
+    convert, total = 0.0, 0.0
+    for _ in range(repeat):
+        start = perf_counter()
+        frames = get_frames()
+        converted = perf_counter()
+
+        for frame in frames.values():
+            Backtest(frame, SmaCross, cash=1000, commission=0.002).run()
+
+        convert += converted - start
+        total += perf_counter() - start
+
+    return convert / repeat, total / repeat
+
+
+def main(n_tickers: int = 50, n_days: int = 252, repeat: int = 3):
+    data = fake_daily(n_tickers=n_tickers, n_days=n_days)
+    print(f"{n_tickers} tickers x {n_days} days, SmaCross, per trial")
+
+    start = perf_counter()
+    dataset = PreparedDataset(data)
+    print(f"{'prepare once':>14}: {(perf_counter() - start) * 1000:8.1f} ms")
+
+    cases = {
+        "daily": lambda: from_daily(data),
+        "panel": lambda: from_panel(data),
+        "prepared": lambda: dataset.frames,
+    }
+    for name, get_frames in cases.items():
+        convert, total = time_trial(get_frames, repeat)
+        print(f"{name:>14}: {convert * 1000:8.1f} ms converting, {total * 1000:8.1f} ms in total")
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    main()
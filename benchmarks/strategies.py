@@ -0,0 +1,132 @@
+"""
+Bars per second of backtesting each daily strategy on GOOG (2004-2013), with crossover events precomputed in init and
+with the previous implementation calling crossover on every bar.
+
+Usage: python -m benchmarks.strategies
+"""
+
+import warnings
+from time import perf_counter
+
+import pandas as pd
+from backtesting import Backtest, Strategy
+from backtesting.lib import crossover
+from backtesting.test import GOOG
+
+from strategies import daily
+
+
+class LegacySmaCross(daily.SmaCross):
+    def next(self):
+        super(daily.SmaCross, self).next()
+
+        if crossover(self.sma1, self.sma2):
+            self.position.close()
+            self.buy()
+
+        elif crossover(self.sma2, self.sma1):
+            self.position.close()
+            self.sell()
+
+
+class LegacyMacdSignalCross(daily.MacdSignalCross):
+    def next(self):
+        super(daily.MacdSignalCross, self).next()
+
+        if crossover(self.macd, self.signal):
+            self.position.close()
+            self.buy()
+
+        elif crossover(self.signal, self.macd):
+            self.position.close()
+            self.sell()
+
+
+class LegacyMacdDerivCross(daily.MacdDerivCross):
+    def next(self):
+        super(daily.MacdDerivCross, self).next()
+
+        if crossover(self.macd_deriv, self.signal):
+            self.position.close()
+            self.buy()
+
+        elif crossover(self.signal, self.macd_deriv):
+            self.position.close()
+            self.sell()
+
+
+class LegacyMacdGradCross(daily.MacdGradCross):
+    def next(self):
+        super(daily.MacdGradCross, self).next()
+
+        if crossover(self.macd_grad, self.signal):
+            self.position.close()
+            self.buy()
+
+        elif crossover(self.signal, self.macd_grad):
+            self.position.close()
+            self.sell()
+
+
+class LegacyMacdGradDerivCross(daily.MacdGradDerivCross):
+    def next(self):
+        super(daily.MacdGradDerivCross, self).next()
+
+        if (
+            crossover(self.macd_grad, self.signal)
+            and self.macd_deriv[-1] >= self.threshold
+            or crossover(self.macd_deriv, self.signal)
+            and self.macd_grad[-1] >= self.threshold
+        ):
+            self.position.close()
+
+            if self.buy_sell in [0, 2]:
+                self.buy()
+
+        elif (
+            crossover(-self.signal, self.macd_grad)
+            and self.macd_deriv[-1] <= -self.threshold
+            or crossover(-self.signal, self.macd_deriv)
+            and self.macd_grad[-1] <= -self.threshold
+        ):
+            self.position.close()
+
+            if self.buy_sell in [1, 2]:
+                self.sell()
+
+
+# Previous implementation of each strategy, calling crossover on every bar, also the reference of the parity tests
+legacy = {
+    daily.SmaCross: LegacySmaCross,
+    daily.MacdSignalCross: LegacyMacdSignalCross,
+    daily.MacdDerivCross: LegacyMacdDerivCross,
+    daily.MacdGradCross: LegacyMacdGradCross,
+    daily.MacdGradDerivCross: LegacyMacdGradDerivCross,
+}
+
+
+def time_run(data: pd.DataFrame, strategy: type[Strategy], repeat: int) -> tuple[float, pd.Series]:
+    """Bars per second and stats of a backtest"""
+    bt = Backtest(data, strategy, cash=10_000, commission=0.002)
+
+    start = perf_counter()
+    for _ in range(repeat):
+        stats = bt.run()
+
+    return repeat * len(data) / (perf_counter() - start), stats
+
+
+def main(repeat: int = 5):
+    print(f"GOOG, {len(GOOG)} bars, bars per second")
+
+    for strategy, legacy_strategy in legacy.items():
+        before, expected = time_run(GOOG, legacy_strategy, repeat)
+        after, stats = time_run(GOOG, strategy, repeat)
+
+        same = stats["_trades"].equals(expected["_trades"])
+        print(f"{strategy.__name__:>20}: {before:8.0f} before, {after:8.0f} after, same trades: {same}")
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    main()
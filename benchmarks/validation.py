@@ -0,0 +1,40 @@
+"""
+Per call overhead of frame validation under each validation mode, for checks inside the application (e.g. database
+reads) and at the API boundary. A single DatabaseApi.get_data call passes through up to four checks.
+
+Usage: python -m benchmarks.validation
+"""
+
+from time import perf_counter
+
+from benchmarks.data import fake_daily
+from config import settings
+from src.time_db.schemas import Daily
+from src.time_db.validation import validate
+
+
+def time_validate(data, boundary: bool, repeat: int = 5) -> float:
+    schema = Daily.to_schema()
+    start = perf_counter()
+    for _ in range(repeat):
+        validate(data, schema, boundary=boundary)
+    return (perf_counter() - start) / repeat
+
+
+def main(n_tickers: int = 500, n_days: int = 2520):
+    data = fake_daily(n_tickers=n_tickers, n_days=n_days)
+    print(f"{n_tickers} tickers x {n_days} days ({data.shape[0]} rows)")
+
+    default = settings.validation_mode
+    try:
+        for mode in ("full", "sampled", "ingest"):
+            settings.validation_mode = mode
+            internal = time_validate(data, boundary=False)
+            boundary = time_validate(data, boundary=True)
+            print(f"{mode:>8}: {internal * 1000:8.1f} ms per internal check, {boundary * 1000:8.1f} ms at boundary")
+    finally:
+        settings.validation_mode = default
+
+
+if __name__ == "__main__":
+    main()
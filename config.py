@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,13 +16,26 @@ class Settings(BaseSettings):
     db_host: str
     db_port: int
     db_name: str
+    # Frames with at least this many rows are inserted with COPY rather than a single INSERT statement
+    bulk_insert_rows: int = 1000
+    # Memory limit of the in process request result cache
+    request_cache_mb: int = 256
+    # Memory limit of the in process cache of indicator results, reused between optimisation trials
+    indicator_cache_mb: int = 64
+    # Frame validation: "full" validates every checked frame, "sampled" a random subset of rows of large frames and
+    # "ingest" only data entering from an API, trusting the database afterwards
+    validation_mode: Literal["full", "sampled", "ingest"] = "full"
+    validation_sample_rows: int = 1000
 
 
 class YahooApiSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     api_key: str
+    # Minimum average number of seconds between requests, shared by all API calls and worker processes
     poll_frequency: float = 0.25
+    # Number of requests that can be made back to back after idling
+    burst_capacity: int = 1
     max_stocks_per_request: int = 10
 
 
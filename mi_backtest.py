@@ -3,10 +3,15 @@ from typing import Any
 
 import pandas as pd
 from backtesting import Backtest
-from hyperopt import STATUS_OK, fmin, hp, space_eval, tpe
+from hyperopt import STATUS_OK, hp, space_eval
 
+from backtest import run_backtest
+from src.analysis.parallel import map_tickers
+from src.analysis.prepared import PreparedDataset, get_panel
+from src.db.cache import ArrowCache
 from src.db.main import DatabaseApi
-from src.time_db.schemas import Daily, daily_to_backtest
+from src.time_db.panel import Panel
+from src.time_db.schemas import Daily
 from strategies.multi_indicator import (
     MacdDeriv,
     MultiIndicatorStrategy,
@@ -15,23 +20,32 @@ from strategies.multi_indicator import (
     Threshold,
 )
 from utils.gen import unflatten_dict
+from utils.optimise import opt
 from utils.tickers import get_snp500_tickers
 
 
 def run(
-    data: pd.MultiIndex,
+    data: Daily | Panel | PreparedDataset,
     msi: MultiSignalIndicator,
     params: dict[str, Any] | None = None,
+    n_jobs: int = 1,
     **kwargs,
 ):
+    """
+    Backtest a multi signal indicator strategy on each ticker, see backtest.run.
+    """
     if params is not None:
         msi.set_params(**params)
 
+    if n_jobs != 1:
+        func = partial(run_backtest, strategy=MultiIndicatorStrategy, msi=msi, **kwargs)
+        return map_tickers(get_panel(data), func, n_jobs=n_jobs), {}
+
+    dataset = data if isinstance(data, PreparedDataset) else PreparedDataset(data)
+
     out, all_bt = {}, {}
-    for stock, stock_df in data.groupby(Daily.stock_id):
-        backtest_df = daily_to_backtest(stock_df)
-        backtest_df = backtest_df.dropna()
-        bt = Backtest(backtest_df, MultiIndicatorStrategy, cash=1000, commission=0.002)
+    for stock, frame in dataset.items():
+        bt = Backtest(frame, MultiIndicatorStrategy, cash=1000, commission=0.002)
 
         out[stock] = bt.run(msi=msi, **kwargs)
         all_bt[stock] = bt
@@ -39,10 +53,6 @@ def run(
     return out, all_bt
 
 
-def opt(obj_func, param_space: dict[str, Any], **kwargs):
-    return fmin(obj_func, param_space, algo=tpe.suggest, **kwargs)
-
-
 def multi_indicator_objective(params, msi: MultiIndicatorStrategy, data):
     params = unflatten_dict(params)
     msi.set_params(**params)
@@ -56,10 +66,10 @@ def multi_indicator_objective(params, msi: MultiIndicatorStrategy, data):
 
 
 if __name__ == "__main__":
-    api = DatabaseApi()
+    api = DatabaseApi(cache=ArrowCache())
     # stocks = EXAMPLE_STOCKS
     stocks = get_snp500_tickers()[:20]
-    data = api.request(stock=stocks, interval="1d", period="1y")
+    data = PreparedDataset(api.request(stock=stocks, interval="1d", period="1y"))
 
     indicator1 = MacdDeriv()
     signal1 = Threshold()
@@ -82,7 +92,7 @@ if __name__ == "__main__":
 
     obj_func = partial(multi_indicator_objective, msi=msi, data=data)
 
-    best = opt(obj_func, param_space=param_space, max_evals=100)
+    best = opt(obj_func, param_space=param_space, max_evals=100, n_jobs=-1, seed=42)
 
     best_params = space_eval(param_space, best)
     print(best_params)
@@ -0,0 +1,94 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from src.analysis.parallel import SharedPanel, SharedPanelSpec, view_panel
+from src.analysis.prepared import PreparedDataset, get_panel
+from src.time_db.panel import Panel
+from src.time_db.schemas import Daily
+
+# Fit and score function of a fold: takes the data, train and test tickers, returns the best parameters and the out of
+# sample stats of each test ticker (one row per ticker)
+FitFold = Callable[[Any, list[str], list[str]], tuple[dict[str, Any], pd.DataFrame]]
+
+# Data of the current worker process, set by the pool initializer
+_memory: SharedMemory | None = None
+_data: Panel | PreparedDataset | None = None
+
+
+def _attach(spec: SharedPanelSpec, prepare: bool):
+    global _memory, _data
+    _memory = SharedMemory(name=spec.name)
+    panel = view_panel(_memory, spec)
+    _data = PreparedDataset(panel) if prepare else panel
+
+
+def _fit_fold(fit: FitFold, train: list[str], test: list[str]) -> tuple[dict[str, Any], pd.DataFrame]:
+    return fit(_data, train, test)
+
+
+def cross_validate(
+    data: Panel | PreparedDataset,
+    fit: FitFold,
+    n_splits: int = 5,
+    n_jobs: int = -1,
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """
+    K-fold cross validation over tickers, fitting folds concurrently in worker processes.
+
+    Data is put in shared memory once (see SharedPanel), workers attach to it when started and only read it, preparing
+    backtest frames once per worker if given a prepared dataset. Results are gathered into one frame with a
+    row per (fold, test ticker), holding the fold's best parameters under "params" and the ticker's out of sample stats
+    under "stats" (see reduce_stats).
+
+    Parameters
+    ----------
+    data: Panel or prepared dataset of all tickers.
+    fit: Picklable function fitting a fold (see FitFold).
+    n_splits: Number of folds.
+    n_jobs: Number of worker processes, -1 for one per CPU, folds are fitted in this process when 1.
+    seed: Random seed of the ticker split.
+    """
+    tickers = np.asarray(data.tickers)
+    folds = [
+        (list(tickers[train]), list(tickers[test]))
+        for train, test in KFold(n_splits=n_splits, shuffle=True, random_state=seed).split(tickers)
+    ]
+
+    if n_jobs == 1:
+        results = [fit(data, train, test) for train, test in folds]
+    else:
+        n_workers = min(os.cpu_count() if n_jobs < 0 else n_jobs, n_splits)
+        prepare = isinstance(data, PreparedDataset)
+
+        with SharedPanel(get_panel(data)) as shared:
+            with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_attach, initargs=(shared.spec, prepare)
+            ) as pool:
+                futures = [pool.submit(_fit_fold, fit, train, test) for train, test in folds]
+                results = [future.result() for future in futures]
+
+    frames = {}
+    for fold, (params, stats) in enumerate(results):
+        stats = stats.loc[:, ~stats.columns.str.startswith("_")].infer_objects()
+        params = pd.DataFrame([params] * len(stats), index=stats.index)
+        frames[fold] = pd.concat({"params": params, "stats": stats}, axis=1)
+
+    return pd.concat(frames, names=["fold", Daily.stock_id])
+
+
+def reduce_stats(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce cross validation results to one row per fold: the fold's best parameters and the mean of each numeric out
+    of sample stat over its test tickers.
+    """
+    params = results["params"].groupby(level="fold").first()
+    stats = results["stats"].select_dtypes("number").groupby(level="fold").mean()
+    return pd.concat({"params": params, "stats": stats}, axis=1)
@@ -0,0 +1,109 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.time_db.panel import Panel, fields
+from src.time_db.schemas import Daily, nytz
+
+
+class SharedPanelSpec(NamedTuple):
+    """Everything a worker needs to attach to a shared panel, small enough to pickle"""
+
+    name: str
+    shape: tuple[int, int]
+    index: np.ndarray
+    tickers: list[str]
+
+
+class SharedPanel:
+    """
+    A panel copied once into a shared memory block, so worker processes can attach to its arrays without pickling them.
+
+    The block holds all fields as one column major (timestamps x tickers x fields) float array, followed by the mask.
+    Use as a context manager, the block is released on exit.
+    """
+
+    def __init__(self, panel: Panel):
+        self.memory = SharedMemory(create=True, size=max(1, get_block_size(panel.shape)))
+        self.spec = SharedPanelSpec(
+            name=self.memory.name,
+            shape=panel.shape,
+            index=panel.index.asi8,
+            tickers=list(panel.tickers),
+        )
+
+        shared = view_panel(self.memory, self.spec)
+        for field in fields:
+            shared[field][:] = panel[field]
+        shared.mask[:] = panel.mask
+
+    def __enter__(self) -> "SharedPanel":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def get_block_size(shape: tuple[int, int]) -> int:
+    n_values = shape[0] * shape[1]
+    return n_values * len(fields) * np.dtype(float).itemsize + n_values
+
+
+def view_panel(memory: SharedMemory, spec: SharedPanelSpec) -> Panel:
+    """
+    Panel backed by a shared memory block, without copying.
+    """
+    values = np.ndarray((*spec.shape, len(fields)), dtype=float, buffer=memory.buf, order="F")
+    mask = np.ndarray(spec.shape, dtype=bool, buffer=memory.buf, offset=values.nbytes, order="F")
+
+    return Panel(
+        index=pd.DatetimeIndex(spec.index, tz="UTC", name=Daily.timestamp).tz_convert(nytz.tz),
+        tickers=spec.tickers,
+        values={field: values[:, :, i] for i, field in enumerate(fields)},
+        mask=mask,
+    )
+
+
+# Panel of the current worker process, set by the pool initializer
+_memory: SharedMemory | None = None
+_panel: Panel | None = None
+
+
+def _attach(spec: SharedPanelSpec):
+    global _memory, _panel
+    _memory = SharedMemory(name=spec.name)
+    _panel = view_panel(_memory, spec)
+
+
+def _apply(func: Callable[[pd.DataFrame], Any], ticker: str) -> Any:
+    return func(_panel.to_backtest(ticker))
+
+
+def map_tickers(panel: Panel, func: Callable[[pd.DataFrame], Any], n_jobs: int = -1) -> dict[str, Any]:
+    """
+    Apply a function to the backtest data of each ticker in a panel, in parallel worker processes.
+
+    Panel data is put in shared memory once, workers attach to it when started, so only tickers and results are passed
+    between processes. Results are in the order of the panel tickers.
+
+    Parameters
+    ----------
+    panel: Data to process.
+    func: Picklable function (e.g. a module level function, or a partial of one) taking a ticker's backtest data.
+    n_jobs: Number of worker processes, -1 for one per CPU.
+    """
+    if n_jobs < 0:
+        n_jobs = os.cpu_count()
+
+    with SharedPanel(panel) as shared:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach, initargs=(shared.spec,)) as pool:
+            results = list(pool.map(partial(_apply, func), panel.tickers))
+
+    return dict(zip(panel.tickers, results, strict=True))
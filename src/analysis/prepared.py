@@ -0,0 +1,78 @@
+from collections.abc import Iterable, Iterator
+
+import pandas as pd
+from pandera.typing import DataFrame
+
+from src.time_db.panel import Panel
+from src.time_db.schemas import Backtest, Daily
+
+
+class PreparedDataset:
+    """
+    Backtest data of each ticker, converted once, so repeated backtests (e.g. optimisation trials) only evaluate
+    strategies.
+
+    Frames are read only, they are shared by all backtests and any attempt to modify their values raises an error.
+    """
+
+    def __init__(self, data: Daily | Panel, frames: dict[str, DataFrame[Backtest]] | None = None):
+        """
+        Parameters
+        ----------
+        data: Daily data or panel of all tickers.
+        frames: Already prepared frames of the panel tickers, used by select.
+        """
+        self.panel = data if isinstance(data, Panel) else Panel.from_daily(data)
+
+        if frames is None:
+            frames = {ticker: freeze(self.panel.to_backtest(ticker)) for ticker in self.panel.tickers}
+
+        self.frames = frames
+
+    @property
+    def tickers(self) -> pd.Index:
+        return self.panel.tickers
+
+    def __getitem__(self, ticker: str) -> DataFrame[Backtest]:
+        return self.frames[ticker]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.panel.tickers)
+
+    def __len__(self) -> int:
+        return len(self.panel.tickers)
+
+    def items(self) -> Iterator[tuple[str, DataFrame[Backtest]]]:
+        for ticker in self.panel.tickers:
+            yield ticker, self.frames[ticker]
+
+    def select(self, tickers: Iterable[str]) -> "PreparedDataset":
+        """
+        Dataset of a subset of tickers, in the given order, sharing the prepared frames.
+        """
+        panel = self.panel.select(tickers)
+        return PreparedDataset(panel, frames={ticker: self.frames[ticker] for ticker in panel.tickers})
+
+
+def get_panel(data: Daily | Panel | PreparedDataset) -> Panel:
+    """
+    Panel of daily data, a panel or a prepared dataset.
+    """
+    if isinstance(data, PreparedDataset):
+        return data.panel
+
+    return data if isinstance(data, Panel) else Panel.from_daily(data)
+
+
+def freeze(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of a frame with read only values, one array per column.
+    """
+    columns = {}
+    for column in data.columns:
+        values = data[column].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[column] = values
+
+    # Without copying, columns are not consolidated and keep the read only arrays
+    return pd.DataFrame(columns, index=data.index, copy=False)
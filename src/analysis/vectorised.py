@@ -0,0 +1,326 @@
+import sys
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+from backtesting import Strategy
+
+from src.analysis.prepared import PreparedDataset, get_panel
+from src.time_db.panel import Panel, backtest_fields
+from src.time_db.schemas import Backtest, Daily
+from strategies import daily
+
+# Default order size of Strategy.buy/sell, all available margin
+full_equity = 1 - sys.float_info.epsilon
+
+# Assuming daily data without weekends (see backtesting compute_stats)
+annual_trading_days = 252
+
+
+class Signals(NamedTuple):
+    """
+    Entry signals of a strategy for every (bar, ticker), placed at the bar close and filled at the next bar open.
+
+    On a long (short) signal any open position is closed, and a long (short) position of all available equity is
+    opened if buy (sell) is enabled.
+    """
+
+    long: np.ndarray
+    short: np.ndarray
+    warmup: np.ndarray
+    buy: bool = True
+    sell: bool = True
+    n_atr: float | None = None
+
+
+def get_warmup(*indicators: np.ndarray) -> np.ndarray:
+    """
+    Number of bars before all indicators have a value, for each ticker (see backtesting _indicator_warmup_nbars).
+    """
+    return np.max([np.isnan(np.asarray(indicator, dtype=float)).argmin(axis=0) for indicator in indicators], axis=0)
+
+
+def sma_cross(close: np.ndarray, strategy: type[daily.SmaCross]) -> Signals:
+    sma1 = daily.simple_moving_avg(close, strategy.n1).to_numpy()
+    sma2 = daily.simple_moving_avg(close, strategy.n2).to_numpy()
+
+    return Signals(*daily.cross_events(sma1, sma2), warmup=get_warmup(sma1, sma2))
+
+
+def macd_signal_cross(close: np.ndarray, strategy: type[daily.MacdSignalCross]) -> Signals:
+    md, signal = (x.to_numpy() for x in daily.macd_signal(close))
+
+    return Signals(*daily.cross_events(md, signal), warmup=get_warmup(md, signal), n_atr=2)
+
+
+def macd_deriv_cross(close: np.ndarray, strategy: type[daily.MacdDerivCross]) -> Signals:
+    md = daily.macd(close).to_numpy()
+    deriv, signal = daily.macd_deriv_signal(md)
+    deriv = deriv.to_numpy()
+
+    return Signals(*daily.cross_events(deriv, signal), warmup=get_warmup(md, deriv, signal), n_atr=2)
+
+
+def macd_grad_cross(close: np.ndarray, strategy: type[daily.MacdGradCross]) -> Signals:
+    md = daily.macd(close).to_numpy()
+    grad, signal = daily.macd_grad_signal(md)
+    grad = grad.to_numpy()
+
+    return Signals(*daily.cross_events(grad, signal), warmup=get_warmup(md, grad, signal), n_atr=2)
+
+
+def macd_grad_deriv_cross(close: np.ndarray, strategy: type[daily.MacdGradDerivCross]) -> Signals:
+    md = daily.macd(close).to_numpy()
+    grad, deriv = (x.to_numpy() for x in daily.macd_grad_deriv(md, smooth=strategy.smooth))
+    long, short = daily.grad_deriv_events(grad, deriv, strategy.threshold)
+
+    return Signals(
+        long,
+        short,
+        warmup=get_warmup(md, grad, deriv),
+        buy=strategy.buy_sell in [0, 2],
+        sell=strategy.buy_sell in [1, 2],
+        n_atr=2,
+    )
+
+
+def macd_grad_cheat(close: np.ndarray, strategy: type[daily.MacdGradCheat]) -> Signals:
+    md = daily.macd(close).to_numpy()
+    grad = np.gradient(md, axis=0)
+
+    return Signals(*daily.cross_events(grad, 0), warmup=get_warmup(md, grad), n_atr=2)
+
+
+# Vectorised equivalent of each supported strategy, computing its signals from close prices
+signal_funcs: dict[type[Strategy], Callable[[np.ndarray, type[Strategy]], Signals]] = {
+    daily.SmaCross: sma_cross,
+    daily.MacdSignalCross: macd_signal_cross,
+    daily.MacdDerivCross: macd_deriv_cross,
+    daily.MacdGradCross: macd_grad_cross,
+    daily.MacdGradDerivCross: macd_grad_deriv_cross,
+    daily.MacdGradCheat: macd_grad_cheat,
+}
+
+
+def run(
+    data: Daily | Panel | PreparedDataset,
+    strategy: type[Strategy],
+    params: dict[str, Any] | None = None,
+    cash: float = 1000,
+    commission: float = 0.002,
+) -> pd.DataFrame:
+    """
+    Backtest a signal strategy on all tickers at once, stepping through bars with array operations over tickers.
+
+    Trades follow backtesting.Backtest with default arguments: market orders fill at the next open with all available
+    equity, trailing stop losses trail the close by a multiple of the 100 bar ATR, and open trades are not closed at
+    the end. Each ticker is backtested on its own rows without missing values, as done by run in backtest.py.
+
+    Parameters
+    ----------
+    data: Daily data, panel or prepared dataset of all tickers.
+    strategy: Strategy class, with vectorised signals (see signal_funcs).
+    params: Optional strategy parameters.
+    cash: Initial cash of each ticker.
+    commission: Commission of each trade, relative to the trade value.
+
+    Returns
+    -------
+    Stats of each ticker, with the columns of Backtest.run stats that do not depend on trade details.
+    """
+    if strategy not in signal_funcs:
+        raise ValueError(f"No vectorised signals for strategy: {strategy.__name__}")
+
+    # Parameters are set on a subclass, leaving the strategy class attributes unchanged
+    configured = type(strategy.__name__, (strategy,), {})
+    configured._check_params(configured, params or {})
+
+    panel = get_panel(data)
+    ohlc, lengths = align_rows(panel)
+    signals = signal_funcs[strategy](ohlc[Backtest.Close], configured)
+
+    equity, trades = simulate(ohlc, lengths, signals, cash=cash, commission=commission)
+    stats = get_stats(equity, lengths, ohlc[Backtest.Close], signals.warmup)
+
+    stats.insert(0, "Exposure Time [%]", trades["exposure"] / lengths * 100)
+    stats["# Trades"] = trades["n_trades"]
+    with np.errstate(invalid="ignore"):
+        stats["Win Rate [%]"] = trades["n_wins"] / trades["n_trades"] * 100
+
+    return stats.set_index(panel.tickers)
+
+
+def align_rows(panel: Panel) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """
+    Backtest prices of all tickers (bars x tickers), with each ticker's rows without missing values moved to the top,
+    so bar i is the i-th bar of every ticker, as in per ticker backtest data. Rows past a ticker's length are missing.
+    """
+    # Rows kept by to_backtest, without any missing backtest value
+    valid = panel.mask & ~np.any([np.isnan(panel[field]) for field in backtest_fields.values()], axis=0)
+    order = np.argsort(~valid, axis=0, kind="stable")
+    lengths = valid.sum(axis=0)
+    padding = np.arange(panel.shape[0])[:, None] >= lengths
+
+    ohlc = {}
+    for column in [Backtest.Open, Backtest.High, Backtest.Low, Backtest.Close]:
+        values = np.take_along_axis(panel[backtest_fields[column]], order, axis=0)
+        values[padding] = np.nan
+        ohlc[column] = values
+
+    return ohlc, lengths
+
+
+def get_atr(ohlc: dict[str, np.ndarray], periods: int = 100) -> np.ndarray:
+    """
+    Average true range of each ticker, as used by TrailingStrategy.
+    """
+    high, low, close = ohlc[Backtest.High], ohlc[Backtest.Low], ohlc[Backtest.Close]
+    prev_close = pd.DataFrame(close).shift(1).to_numpy()
+
+    true_range = np.max([high - low, np.abs(prev_close - high), np.abs(prev_close - low)], axis=0)
+    return pd.DataFrame(true_range).rolling(periods).mean().bfill().to_numpy()
+
+
+def simulate(
+    ohlc: dict[str, np.ndarray],
+    lengths: np.ndarray,
+    signals: Signals,
+    cash: float = 1000,
+    commission: float = 0.002,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Step through bars, processing the orders of all tickers at once, following backtesting's broker.
+
+    Returns
+    -------
+    Equity (bars x tickers, missing before the first trading bar and past each ticker's length), and per ticker trade
+    counts: closed trades, winning trades and bars with an open position.
+    """
+    open_, high, low, close = (ohlc[column] for column in [Backtest.Open, Backtest.High, Backtest.Low, Backtest.Close])
+    n_bars, n_tickers = close.shape
+    start = 1 + signals.warmup
+    atr = get_atr(ohlc) if signals.n_atr is not None else None
+
+    equity = np.full(close.shape, np.nan)
+    balance = np.full(n_tickers, float(cash))
+    size = np.zeros(n_tickers)
+    entry_price = np.zeros(n_tickers)
+    entry_bar = np.zeros(n_tickers, dtype=int)
+    stop_loss = np.zeros(n_tickers)
+    pending_close, pending_buy, pending_sell = (np.zeros(n_tickers, dtype=bool) for _ in range(3))
+    broke = np.zeros(n_tickers, dtype=bool)
+    trades = {name: np.zeros(n_tickers, dtype=int) for name in ["n_trades", "n_wins", "exposure"]}
+    last_exposed = np.full(n_tickers, -1)
+
+    def close_trades(closing: np.ndarray, price: np.ndarray, i: int):
+        pl = size * (price - entry_price)
+        exit_commission = np.abs(size) * price * commission
+        entry_commission = np.abs(size) * entry_price * commission
+
+        balance[closing] += (pl - exit_commission)[closing]
+        trades["n_trades"] += closing
+        trades["n_wins"] += closing & (pl - (exit_commission + entry_commission) > 0)
+        trades["exposure"] += np.where(closing, i - np.maximum(entry_bar, last_exposed + 1) + 1, 0)
+        last_exposed[closing] = i
+        size[closing] = 0
+
+    def open_trades(opening: np.ndarray, price: np.ndarray, direction: int, i: int):
+        # Units affordable with all available margin, including commission (see _Broker._process_orders)
+        price_plus_commission = price + (full_equity * price * commission) / full_equity
+        with np.errstate(invalid="ignore"):
+            units = (np.maximum(0, balance) * 1.0 * full_equity) // price_plus_commission
+
+        opening = opening & (units > 0)
+        size[opening] = direction * units[opening]
+        entry_price[opening] = price[opening]
+        entry_bar[opening] = i
+        stop_loss[opening] = -direction * np.inf
+        balance[opening] -= (units * price * commission)[opening]
+
+    for i in range(n_bars):
+        active = (i >= start) & (i < lengths) & ~broke
+
+        # Positions closed on the previous bar are closed at the open, before stop losses are processed
+        close_trades(active & pending_close & (size != 0), open_[i], i)
+
+        if atr is not None:
+            long_stop = active & (size > 0) & (low[i] <= stop_loss)
+            short_stop = active & (size < 0) & (high[i] >= stop_loss)
+            stop_price = np.where(long_stop, np.minimum(open_[i], stop_loss), np.maximum(open_[i], stop_loss))
+            close_trades(long_stop | short_stop, stop_price, i)
+
+        open_trades(active & pending_buy, open_[i], 1, i)
+        open_trades(active & pending_sell, open_[i], -1, i)
+
+        value = balance + size * (close[i] - entry_price)
+        equity[i] = np.where(active, value, equity[i])
+
+        # Out of money, close trades at the last price and stop trading
+        ruined = active & (value <= 0)
+        if ruined.any():
+            close_trades(ruined & (size != 0), close[i], i)
+            balance[ruined] = 0
+            equity[i:, ruined] = 0
+            broke |= ruined
+            active &= ~ruined
+
+        if atr is not None:
+            trailing = close[i] - atr[i] * signals.n_atr, close[i] + atr[i] * signals.n_atr
+            stop_loss[:] = np.where(size > 0, np.fmax(stop_loss, trailing[0]), stop_loss)
+            stop_loss[:] = np.where(size < 0, np.fmin(stop_loss, trailing[1]), stop_loss)
+
+        pending_close = active & (signals.long[i] | signals.short[i])
+        pending_buy = active & signals.long[i] & signals.buy
+        pending_sell = active & signals.short[i] & signals.sell
+
+    # Equity is constant until the first trading bar, and missing past each ticker's data
+    past_end = np.arange(n_bars)[:, None] >= lengths
+    equity = pd.DataFrame(equity).bfill().fillna(float(cash)).to_numpy()
+    equity[past_end] = np.nan
+
+    return equity, trades
+
+
+def get_stats(equity: np.ndarray, lengths: np.ndarray, close: np.ndarray, warmup: np.ndarray) -> pd.DataFrame:
+    """
+    Equity based stats of each ticker, computed as in backtesting compute_stats, assuming daily bars.
+    """
+    last = np.maximum(lengths - 1, 0)
+    tickers = np.arange(equity.shape[1])
+    final = equity[last, tickers]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = equity[1:] / equity[:-1] - 1
+        n_returns = np.maximum(lengths - 1, 0)
+
+        # Geometric mean of daily returns, zero on any total loss
+        log_returns = np.log1p(np.nan_to_num(returns, nan=0.0))
+        gmean = np.exp(np.nansum(log_returns, axis=0) / np.where(n_returns, n_returns, np.nan)) - 1
+        gmean = np.where(np.nanmin(np.where(np.isnan(returns), 0, returns), axis=0, initial=0) <= -1, 0, gmean)
+
+        annual_return = (1 + gmean) ** annual_trading_days - 1
+        variance = np.nanvar(returns, axis=0, ddof=1)
+        volatility = (
+            np.sqrt((variance + (1 + gmean) ** 2) ** annual_trading_days - (1 + gmean) ** (2 * annual_trading_days))
+            * 100
+        )
+
+        downside = np.sqrt(np.nanmean(np.clip(returns, -np.inf, 0) ** 2, axis=0)) * np.sqrt(annual_trading_days)
+        drawdown = np.nanmax(1 - equity / np.fmax.accumulate(equity, axis=0), axis=0)
+        first_close = close[np.minimum(warmup, last), tickers]
+
+        return pd.DataFrame(
+            {
+                "Equity Final [$]": final,
+                "Equity Peak [$]": np.nanmax(equity, axis=0),
+                "Return [%]": (final - equity[0]) / equity[0] * 100,
+                "Buy & Hold Return [%]": (close[last, tickers] - first_close) / first_close * 100,
+                "Return (Ann.) [%]": annual_return * 100,
+                "Volatility (Ann.) [%]": volatility,
+                "Sharpe Ratio": annual_return * 100 / np.where(volatility == 0, np.nan, volatility),
+                "Sortino Ratio": annual_return / downside,
+                "Calmar Ratio": annual_return / np.where(drawdown == 0, np.nan, drawdown),
+                "Max. Drawdown [%]": -np.nan_to_num(drawdown) * 100,
+            }
+        )
@@ -1,22 +1,27 @@
+import asyncio
 import json
-from datetime import datetime, timezone
-from time import sleep
+import threading
 
+import aiohttp
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
-from pandera import check_output
 from pandera.typing import DataFrame
 
 from config import yahoo_api_settings
+from src.api import rate
 from src.db import schemas
-from src.time_db.schemas import Daily
-from utils.gen import batch
+from src.time_db.schemas import Daily, compact_daily, nytz
+from src.time_db.validation import check_output
+from utils.gen import batch, chunk
+
+# yfinance.download collects results in module globals, so concurrent downloads (e.g. from pipeline threads) can mix
+# up or wait forever on each other's tickers
+_download_lock = threading.Lock()
 
 
 class FinanceApi:
-    last_request = None
-    poll_frequency = yahoo_api_settings.poll_frequency
     max_stocks_per_request = yahoo_api_settings.max_stocks_per_request
 
     def __init__(
@@ -53,23 +58,36 @@ class FinanceApi:
         req = schemas.RequestBase(stock=stock, **kwargs)
         return self.make_request(req)
 
-    @check_output(schema=Daily.to_schema())
-    def make_request(self, request: schemas.RequestBase, interval_key: str | None = None, **kwargs) -> DataFrame[Daily]:
+    @check_output(Daily.to_schema(), boundary=True)
+    def make_request(
+        self,
+        request: schemas.RequestBase,
+        interval_key: str | None = None,
+        by_date: bool = False,
+        compact: bool = False,
+        **kwargs,
+    ) -> DataFrame[Daily]:
         """Make request to API for input stocks, using default parameters set during initialisation, and merge with
         existing database data.
         :param request: request schema with all information needed to make an API request
         :param interval_key: optional interval key, if none provided request interval will be used (default)
+        :param by_date: request the start/end dates of the request instead of its period, end date is exclusive
+        :param compact: return data in the memory efficient CompactDaily layout
         :param kwargs: arguments to be passed directly to API, allows additional arguments to be specified or defaults
             overwritten.
         """
 
         tickers = [request.stock] if isinstance(request.stock, str) else request.stock
-        period = request.period
+
+        if by_date:
+            dates = {"start": request.start_date, "end": request.end_date}
+        else:
+            dates = {"period": request.period}
 
         if interval_key is None:
             interval_key = request.interval.key
 
-        output = self._download(tickers=tickers, period=period, interval=interval_key, **kwargs)
+        output = self._download(tickers=tickers, interval=interval_key, **dates, **kwargs)
 
         if output is None:
             return None
@@ -91,12 +109,14 @@ class FinanceApi:
         # output.index = output.index.tz_localize(nytz.tz)
         output = output.stack(level=0, future_stack=True).reset_index()  # noqa: PD013
         output.columns = [x.lower().replace(" ", "_") for x in output.columns]
-        return output.rename(columns={"date": Daily.timestamp, "level_0": Daily.timestamp, "level_1": Daily.stock_id})
+        output = output.rename(columns={"date": Daily.timestamp, "level_0": Daily.timestamp, "level_1": Daily.stock_id})
+
+        return compact_daily(output) if compact else output
 
     @batch(size=yahoo_api_settings.max_stocks_per_request, concat_axis=1)
     def _download(self, tickers, **kwargs):
         """
-        Wrapper around 'yfinance.download' to request data, while respecting the API poll frequency
+        Wrapper around 'yfinance.download' to request data, while respecting the shared API rate limit
 
         Parameters
         ----------
@@ -107,18 +127,9 @@ class FinanceApi:
         params = self.default_params.copy()
         params.update(kwargs)
 
-        since_last = (
-            (datetime.now(tz=timezone.utc) - self.last_request).total_seconds()
-            if self.last_request is not None
-            else float("inf")
-        )
-        if self.poll_frequency > since_last:
-            sleep(self.poll_frequency - since_last)
-
-        output = yf.download(tickers, **params)
-        self.last_request = datetime.now(tz=timezone.utc)
-
-        return output
+        with _download_lock:
+            rate.rate_limiter.acquire()
+            return yf.download(tickers, **params)
 
 
 class YahooApi:
@@ -141,6 +152,7 @@ class YahooApi:
         return self.make_request(endpoint, params=params)
 
     def make_request(self, endpoint: str, params: dict):
+        rate.rate_limiter.acquire()
         return requests.request("GET", endpoint, headers=self.headers, params=params)
 
     @staticmethod
@@ -148,5 +160,111 @@ class YahooApi:
         return json.loads(response.content.decode("utf-8"))
 
 
+class AsyncYahooApi:
+    """
+    Asyncio variant of YahooApi, requesting batches of symbols concurrently over a pool of keep-alive connections.
+
+    Use as an async context manager, so the connection pool is opened and closed once:
+
+        async with AsyncYahooApi() as api:
+            data = await api.get_stock_history(request)
+    """
+
+    api_key = yahoo_api_settings.api_key
+    max_stocks_per_request = yahoo_api_settings.max_stocks_per_request
+
+    def __init__(self, base_url: str = "https://yfapi.net", concurrency: int = 4):
+        """
+        :param base_url: API root, can be pointed to a local server for testing
+        :param concurrency: maximum number of requests in flight (and pooled connections) at once
+        """
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.headers = {"x-api-key": self.api_key}
+        self.session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(base_url=self.base_url, headers=self.headers, connector=connector)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def get_stock_history(self, request: schemas.RequestBase) -> pd.DataFrame:
+        """
+        Request spark (close price) history for all stocks of a request, in concurrent batches of symbols.
+        """
+        tickers = [request.stock] if isinstance(request.stock, str) else list(request.stock)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def request_batch(symbols: list[str]) -> pd.DataFrame:
+            params = {
+                "symbols": ",".join(symbols),
+                "range": request.period,
+                "interval": request.interval.key,
+            }
+            async with semaphore:
+                payload = await self.make_request("/v8/finance/spark", params=params)
+
+            return parse_spark(payload, daily=request.get_base_interval() == "1d")
+
+        batches = chunk(tickers, self.max_stocks_per_request)
+        results = await asyncio.gather(*(request_batch(symbols) for symbols in batches))
+        return pd.concat(results, ignore_index=True)
+
+    async def make_request(self, endpoint: str, params: dict) -> dict:
+        # Wait for a token without blocking the event loop, other requests queue behind this one
+        await asyncio.sleep(rate.rate_limiter.reserve())
+
+        async with self.session.get(endpoint, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+def parse_spark(payload: dict, daily: bool = True) -> pd.DataFrame:
+    """
+    Parse a spark response, mapping symbols to timestamps and close prices, into the Daily frame layout.
+
+    Spark responses only contain close prices, so open, high and low are missing, adjusted close is the close and volume
+    is missing (nullable integer), frames therefore have the Daily layout but will not pass Daily validation.
+
+    Parameters
+    ----------
+    payload: Decoded spark response.
+    daily: Whether the data has a daily interval, so timestamps (market open) are normalised to midnight like the
+        timestamps returned by FinanceApi.
+    """
+    frames = []
+    for symbol, series in payload.items():
+        timestamps = pd.to_datetime(series["timestamp"], unit="s", utc=True).tz_convert(nytz.tz)
+        if daily:
+            timestamps = timestamps.normalize()
+
+        close = np.asarray(series["close"], dtype=float)
+        missing = np.full(len(close), np.nan)
+
+        frames.append(
+            pd.DataFrame(
+                {
+                    Daily.stock_id: symbol,
+                    Daily.timestamp: timestamps,
+                    Daily.open: missing,
+                    Daily.high: missing,
+                    Daily.low: missing,
+                    Daily.close: close,
+                    Daily.adj_close: close,
+                    Daily.volume: pd.array([pd.NA] * len(close), dtype="Int64"),
+                }
+            )
+        )
+
+    if not frames:
+        return pd.DataFrame(columns=list(Daily.to_schema().columns))
+
+    return pd.concat(frames, ignore_index=True)
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,58 @@
+import multiprocessing as mp
+from time import monotonic, sleep
+
+from config import yahoo_api_settings
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Tokens refill continuously at a fixed rate up to a burst capacity, each request takes a
+    token and waits when none are available.
+
+    State is kept in shared memory, so a limiter inherited by worker processes (forked, or passed to a process/pool
+    initializer and installed with set_rate_limiter) enforces one budget across all of them.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        :param rate: tokens added per second, i.e. the sustained number of requests per second
+        :param capacity: maximum number of tokens, i.e. the number of requests that can be made at once after idling
+        """
+        self.rate = rate
+        self.capacity = capacity
+        # Available tokens and time of last update, sharing one lock
+        self._state = mp.Array("d", [float(capacity), monotonic()])
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Take tokens without waiting and return the number of seconds until they are available. Available tokens may go
+        negative, so later callers queue behind earlier ones.
+        """
+        with self._state.get_lock():
+            available, updated = self._state[:]
+            now = monotonic()
+
+            available = min(self.capacity, available + (now - updated) * self.rate) - tokens
+            self._state[:] = [available, now]
+
+        return max(0.0, -available / self.rate)
+
+    def acquire(self, tokens: int = 1):
+        """Block until tokens are available"""
+        sleep(self.reserve(tokens))
+
+
+def set_rate_limiter(limiter: TokenBucket):
+    """
+    Install a limiter as the process wide default, intended as a worker process initializer so spawned workers share
+    the parent's budget.
+    """
+    global rate_limiter
+    rate_limiter = limiter
+
+
+# Shared by all API entry points
+rate_limiter = TokenBucket(
+    rate=1 / yahoo_api_settings.poll_frequency,
+    capacity=yahoo_api_settings.burst_capacity,
+)
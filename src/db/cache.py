@@ -0,0 +1,245 @@
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Iterable
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from pandera.typing import DataFrame
+
+from config import settings
+from src.db import schemas
+from src.time_db.schemas import Daily, nytz
+
+daily_arrow_schema = pa.schema(
+    [
+        (Daily.stock_id, pa.string()),
+        (Daily.timestamp, pa.timestamp("ns", tz=str(nytz.tz))),
+        (Daily.open, pa.float64()),
+        (Daily.high, pa.float64()),
+        (Daily.low, pa.float64()),
+        (Daily.close, pa.float64()),
+        (Daily.adj_close, pa.float64()),
+        (Daily.volume, pa.int64()),
+    ]
+)
+
+
+class ArrowCache:
+    """
+    On disk read-through cache of daily data, stored as one columnar Arrow (Feather) file per ticker and (UTC) year.
+
+    Partitions are always filled with a full year from the loader, so they can answer any request over that year, and
+    are removed whenever new data is written to them (see invalidate).
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path if path else settings.data_path / "cache" / "daily"
+
+    def get(
+        self,
+        request: schemas.RequestBase,
+        loader: Callable[[schemas.RequestBase], DataFrame[Daily]],
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Read data for a request from the cache, filling missing partitions from the loader first.
+
+        Parameters
+        ----------
+        request: Request schema defining the tickers and dates to read, must have a start date.
+        loader: Function returning data from the source of truth (database) for a request.
+        columns: Optional subset of columns to read, all columns are read by default.
+        """
+
+        start, end = get_date_bounds(request)
+        years = range(request.start_date.year, request.end_date.year + 1)
+        partitions = [(ticker, year) for ticker in sorted(request.stock) for year in years]
+
+        missing = [partition for partition in partitions if not self.partition_path(*partition).exists()]
+        if missing:
+            self.fill(missing, loader)
+
+        # Memory mapped, uncompressed Arrow files are read without copying
+        table = pa.concat_tables(
+            pa.ipc.open_file(pa.memory_map(str(self.partition_path(*partition)))).read_all() for partition in partitions
+        )
+        timestamp_type = daily_arrow_schema.field(Daily.timestamp).type
+        mask = pc.and_(
+            pc.greater_equal(table[Daily.timestamp], pa.scalar(start, timestamp_type)),
+            pc.less(table[Daily.timestamp], pa.scalar(end, timestamp_type)),
+        )
+        table = table.filter(mask)
+
+        if columns is not None:
+            table = table.select(columns)
+
+        data = table.to_pandas()
+
+        # Arrow restores the timezone by name, use the same timezone object as the schema
+        if Daily.timestamp in data:
+            data[Daily.timestamp] = data[Daily.timestamp].astype(nytz)
+
+        return data
+
+    def fill(self, partitions: list[tuple[str, int]], loader: Callable[[schemas.RequestBase], DataFrame[Daily]]):
+        """
+        Load full years of data for the given (ticker, year) partitions and write them to the cache. Partitions with no
+        data are written empty, so they are not reloaded until invalidated.
+        """
+
+        tickers_by_year = defaultdict(list)
+        for ticker, year in partitions:
+            tickers_by_year[year].append(ticker)
+
+        for year, tickers in tickers_by_year.items():
+            request = schemas.RequestBase(
+                stock=tickers,
+                period=None,
+                start_date=datetime(year, 1, 1, tzinfo=timezone.utc),
+                end_date=datetime(year, 12, 31, tzinfo=timezone.utc),
+            )
+            data = loader(request)
+            groups = dict(list(data.groupby(Daily.stock_id)))
+
+            for ticker in tickers:
+                self.write(ticker, year, groups.get(ticker, data.iloc[:0]))
+
+    def write(self, ticker: str, year: int, data: DataFrame[Daily]):
+        path = self.partition_path(ticker, year)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        table = pa.Table.from_pandas(data, schema=daily_arrow_schema, preserve_index=False)
+
+        # Write then move, so concurrent readers never see a partially written partition
+        temp_path = path.with_suffix(".tmp")
+        feather.write_feather(table, temp_path, compression="uncompressed")
+        temp_path.replace(path)
+
+    def invalidate(self, data: DataFrame[Daily]):
+        """
+        Remove all partitions that data would be written to.
+        """
+        years = data[Daily.timestamp].dt.tz_convert(timezone.utc).dt.year
+        for ticker, year in set(zip(data[Daily.stock_id], years, strict=True)):
+            self.partition_path(ticker, year).unlink(missing_ok=True)
+
+    def partition_path(self, ticker: str, year: int) -> Path:
+        return self.path / ticker / f"{year}.arrow"
+
+
+class RequestKey(NamedTuple):
+    interval: str
+    tickers: frozenset[str]
+    # Start date is undefined for "max" period requests
+    start_date: date | None
+    end_date: date
+
+    @classmethod
+    def from_request(cls, request: schemas.RequestBase) -> "RequestKey":
+        """Normalise a request to the full days it resolves to, as used by the database and calendar queries"""
+        return cls(
+            interval=request.interval.key,
+            tickers=frozenset(request.stock),
+            start_date=request.start_date.date() if request.start_date else None,
+            end_date=request.end_date.date(),
+        )
+
+    def covers(self, other: "RequestKey") -> bool:
+        """Whether the data for this key is a superset of the data for other"""
+        return (
+            self.interval == other.interval
+            and self.tickers >= other.tickers
+            and (self.start_date is None or (other.start_date is not None and self.start_date <= other.start_date))
+            and self.end_date >= other.end_date
+        )
+
+
+class RequestCache:
+    """
+    In process, size bounded LRU cache of request results.
+
+    Any cached result covering the tickers and dates of a request (e.g. a year of data for a month request) answers it
+    by slicing, results for a ticker are dropped whenever new data is written for it (see invalidate).
+    """
+
+    def __init__(self, max_bytes: int = settings.request_cache_mb * 2**20):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[RequestKey, pd.DataFrame] = OrderedDict()
+        self.sizes: dict[RequestKey, int] = {}
+
+    def get(self, request: schemas.RequestBase) -> DataFrame[Daily] | None:
+        key = RequestKey.from_request(request)
+
+        # Most recently used entries are checked first
+        for entry_key in reversed(self.entries):
+            if entry_key.covers(key):
+                self.entries.move_to_end(entry_key)
+                return slice_request(self.entries[entry_key], key)
+
+        return None
+
+    def put(self, request: schemas.RequestBase, data: DataFrame[Daily]):
+        key = RequestKey.from_request(request)
+        size = int(data.memory_usage(deep=True).sum())
+
+        if size > self.max_bytes:
+            return
+
+        self.remove(key)
+        self.entries[key] = data.copy()
+        self.sizes[key] = size
+
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def invalidate(self, tickers: Iterable[str]):
+        """
+        Remove all entries containing any of the given tickers.
+        """
+        tickers = set(tickers)
+        for key in [key for key in self.entries if key.tickers & tickers]:
+            self.remove(key)
+
+    def remove(self, key: RequestKey):
+        self.entries.pop(key, None)
+        self.sizes.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes.values())
+
+
+def slice_request(data: DataFrame[Daily], key: RequestKey) -> DataFrame[Daily]:
+    """
+    Select the rows of data for the tickers and full days of a request key, always returns a copy.
+    """
+    mask = data[Daily.stock_id].isin(key.tickers)
+
+    if key.start_date is not None:
+        mask &= data[Daily.timestamp] >= pd.Timestamp(key.start_date, tz=timezone.utc)
+
+    mask &= data[Daily.timestamp] < pd.Timestamp(key.end_date + timedelta(days=1), tz=timezone.utc)
+
+    return data[mask].reset_index(drop=True)
+
+
+def get_date_bounds(request: schemas.RequestBase) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Get the (inclusive) start and (exclusive) end timestamp of the full days covered by a request, matching the
+    date filters used when querying the database.
+    """
+    start = pd.Timestamp(request.start_date.date(), tz=timezone.utc)
+    end = pd.Timestamp(request.end_date.date() + timedelta(days=1), tz=timezone.utc)
+    return start, end
+
+
+# Shared by all DatabaseApi instances by default, so repeated requests within a session are only made once
+request_cache = RequestCache()
@@ -1,17 +1,26 @@
-from datetime import datetime
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
-import pandas_market_calendars as mcal
-from pandera import check_output
 from pandera.typing import DataFrame
+from sqlalchemy import Select, select
 
+from config import settings
 from src.api.main import FinanceApi
 from src.db import schemas
+from src.db.cache import ArrowCache, RequestCache, request_cache
+from src.time_db import models
 from src.time_db.database import engine
-from src.time_db.schemas import Daily, nytz
+from src.time_db.schemas import Daily, compact_daily, nytz
 from src.time_db.update import insert_ohlc_data
+from src.time_db.validation import check_output, validate
 from utils.gen import get_empty_pandera_df
+from utils.market import MarketCalendar, get_calendar, get_missing_ranges
+
+# Directory of saved market calendar grids, calendars are shared per market and path (see get_calendar)
+calendar_path = settings.data_path / "calendars"
 
 
 class DatabaseApi:
@@ -19,10 +28,26 @@ class DatabaseApi:
         self,
         api: FinanceApi | None = None,
         market: str = "NYSE",
+        cache: ArrowCache | None = None,
+        result_cache: RequestCache | None = request_cache,
     ):
+        """
+        Parameters
+        ----------
+        api: Finance API used to request data missing from the database.
+        market: Market calendar used to determine expected timestamps.
+        cache: Optional on disk cache to read stored data through, recommended for repeated research reads of
+            historical data.
+        result_cache: In process cache of request results, shared between instances by default. None to disable.
+        """
         self.api = api if api else FinanceApi()
         self.market = market
-        self.calendar = mcal.get_calendar(market)
+        self.cache = cache
+        self.result_cache = result_cache
+        self.calendar = get_calendar(market, path=calendar_path)
+        # Timestamps of each ticker already requested from the API but not returned (e.g. before listing, halts, or an
+        # unfinished session), so holes the API cannot fill are only requested once
+        self.checked: dict[str, pd.DatetimeIndex] = {}
 
     def request(
         self,
@@ -57,9 +82,11 @@ class DatabaseApi:
         request: schemas.RequestBase,
         request_nan: bool = False,
         force: bool = False,
+        compact: bool = False,
     ):
         """
-        Get data from an input request. Will first query internal database, if data is missing it will make an API call.
+        Get data from an input request. Will first query internal database, then diff the stored timestamps of each
+        ticker against the market calendar and make API calls for the missing date ranges only.
 
         Parameters
         ----------
@@ -68,69 +95,146 @@ class DatabaseApi:
             made if any value is NaN. The API data has many missing values, so this should only be used for infrequent
             or scheduled maintenance calls.
         force: Make API call without checking internal database. Useful for fixing broken data.
+        compact: Return data in the memory efficient CompactDaily layout.
         """
 
-        # Taking a copy since we may make changes to stocks
-        request = request.model_copy()
+        use_result_cache = self.result_cache is not None and not (force or request_nan)
+
+        if use_result_cache:
+            cached = self.result_cache.get(request)
 
+            if cached is not None:
+                return compact_daily(cached) if compact else cached
+
+        base_interval = request.get_base_interval()
         base_indices = get_indices(
             request=request,
             calendar=self.calendar,
-            frequency=request.get_base_interval(),
+            frequency=base_interval,
         ).astype(nytz)
 
-        db_data = None
+        db_data = get_empty_pandera_df(Daily) if force else self.get_db_data(request)
+
+        if request_nan:
+            db_data = db_data.dropna()
+
+        # Group tickers sharing the same holes, so each missing range is requested once for all of them
+        gaps = defaultdict(list)
+        stored = db_data.groupby(Daily.stock_id)[Daily.timestamp]
 
-        if not force:
-            db_data = self.get_db_data(request)
+        for ticker in request.stock:
+            present = stored.get_group(ticker) if ticker in stored.groups else []
 
-        request.stock = list(set(request.stock) - set(db_data[Daily.stock_id].unique()))
+            # Forced and NaN repair requests refetch ranges even if they were requested before
+            if ticker in self.checked and not (force or request_nan):
+                present = self.checked[ticker].union(present)
 
-        if request.stock:
-            response = self.api.make_request(request, interval_key=request.get_base_interval())
+            for gap in get_missing_ranges(base_indices, present):
+                gaps[gap].append(ticker)
 
-            # Ensure all rows are present.
-            # Data returned may not be complete, and we do not want to make repeated requests because data is missing.
-            response = (
-                response.set_index(Daily.timestamp)
-                .reindex(base_indices)
-                .reset_index()
-                .rename(columns={"index": Daily.timestamp})
+        responses = []
+        for (start, end), tickers in gaps.items():
+            # End date is exclusive in API requests
+            gap_request = schemas.RequestBase(
+                stock=tickers,
+                interval=base_interval,
+                period=None,
+                start_date=start,
+                end_date=end + schemas.Interval.from_string(base_interval).delta,
             )
+            response = self.api.make_request(gap_request, by_date=True)
+
+            if response is None:
+                continue
+
+            # Data returned may not be complete, remember the whole range was requested so missing rows are not
+            # requested again, and only keep the rows returned within it
+            gap_indices = base_indices[(base_indices >= start) & (base_indices <= end)]
+            for ticker in tickers:
+                self.checked[ticker] = gap_indices.union(self.checked.get(ticker, gap_indices[:0]))
+
+            in_gap = response[Daily.timestamp].isin(gap_indices) & response[Daily.stock_id].isin(tickers)
+            response = response[in_gap].dropna()
 
-            if response is not None and response.shape[0]:
+            if response.shape[0]:
                 self.put_data(response)
+                responses.append(response)
 
-            db_data = pd.concat([db_data, response]).reset_index(drop=True)
+        if responses:
+            db_data = pd.concat([db_data, *responses]).sort_values([Daily.stock_id, Daily.timestamp])
 
-        return db_data
+        db_data = db_data.reset_index(drop=True)
+
+        if use_result_cache:
+            self.result_cache.put(request, db_data)
+
+        return compact_daily(db_data) if compact else db_data
 
     @check_output(Daily.to_schema())
-    def get_db_data(self, request: schemas.RequestBase) -> pd.DataFrame | None:
+    def get_db_data(self, request: schemas.RequestBase, compact: bool = False) -> pd.DataFrame | None:
         """
-        Filter store data by key and optional start/end dates
+        Filter store data by tickers and optional start/end dates, read through the cache if one is set
         NOTE: Currently assumes full days only, inclusive of start/end dates
         """
 
-        tickers_string = ", ".join(f"'{ticker}'" for ticker in request.stock)
-        # Assuming all requests have been converted to start date, end date format
-        if request.start_date:
-            query = f"""
-                SELECT *
-                FROM daily
-                WHERE timestamp BETWEEN '{request.start_date.date()}' AND '{request.end_date.date()}'
-                AND stock_id IN ({tickers_string})
-                ORDER BY timestamp;
-            """  # noqa: S608
+        if self.cache is not None and request.start_date:
+            data = self.cache.get(request, loader=self._query_db_data)
         else:
-            query = f"""
-                SELECT *
-                FROM daily
-                AND stock_id IN ({tickers_string})
-                ORDER BY timestamp;
-            """  # noqa: S608
+            data = self._query_db_data(request)
+
+        return compact_daily(data) if compact else data
+
+    def get_db_columns(self, request: schemas.RequestBase, columns: list[str]) -> pd.DataFrame:
+        """
+        Get a subset of columns of stored data, only the requested columns are read when a cache is set.
+        """
+
+        if self.cache is not None and request.start_date:
+            return self.cache.get(request, loader=self._query_db_data, columns=columns)
+
+        return self.get_db_data(request)[columns]
+
+    def _query_db_data(self, request: schemas.RequestBase) -> pd.DataFrame:
+        chunks = list(self._read_db_chunks(request))
+
+        # Empty results have no dtype information, fall back to a typed empty frame
+        return pd.concat(chunks, ignore_index=True) if chunks else get_empty_pandera_df(Daily)
+
+    def stream_db_data(
+        self,
+        request: schemas.RequestBase,
+        chunk_size: int = 100_000,
+        by_ticker: bool = False,
+        compact: bool = False,
+    ) -> Iterator[DataFrame[Daily]]:
+        """
+        Lazily yield stored data for a request, read through a server side cursor so memory use is bounded by the chunk
+        size rather than the size of the result.
+
+        Parameters
+        ----------
+        request: Request schema defining the tickers and dates to read.
+        chunk_size: Number of rows fetched from the database at a time, and the size of yielded chunks.
+        by_ticker: Yield one complete frame per ticker instead of fixed size chunks.
+        compact: Yield chunks in the memory efficient CompactDaily layout.
+        """
 
-        return pd.read_sql(query, engine)
+        chunks = self._read_db_chunks(request, chunk_size=chunk_size)
+
+        if by_ticker:
+            chunks = split_by_ticker(chunks)
+
+        for chunk in chunks:
+            yield validate(compact_daily(chunk) if compact else chunk, Daily.to_schema())
+
+    @staticmethod
+    def _read_db_chunks(request: schemas.RequestBase, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as connection:
+            for chunk in pd.read_sql(get_daily_query(request), connection, chunksize=chunk_size):
+                if not chunk.empty:
+                    # Timestamps are read as UTC, convert here rather than relying on validation to coerce them
+                    chunk[Daily.timestamp] = chunk[Daily.timestamp].dt.tz_convert(nytz.tz)
+                    yield chunk
 
     def put_data(self, data: DataFrame[Daily]):
         """
@@ -142,26 +246,63 @@ class DatabaseApi:
             if not stock_df.empty:
                 insert_ohlc_data(ticker=stock, data=stock_df)
 
+                if self.cache is not None:
+                    self.cache.invalidate(stock_df)
+
+                if self.result_cache is not None:
+                    self.result_cache.invalidate([stock])
+
+
+def get_daily_query(request: schemas.RequestBase) -> Select:
+    """
+    Parameterised query of daily data for the tickers and full days (inclusive) of a request, ordered by ticker.
+    """
+    table = models.Daily.__table__
+    query = select(table).where(table.c.stock_id.in_(request.stock))
 
-def get_indices(request: schemas.RequestBase, calendar, frequency: str | None = None):
+    # Start date is undefined for "max" period requests
+    if request.start_date:
+        query = query.where(table.c.timestamp >= request.start_date.date())
+
+    if request.end_date:
+        query = query.where(table.c.timestamp < request.end_date.date() + timedelta(days=1))
+
+    return query.order_by(table.c.stock_id, table.c.timestamp)
+
+
+def split_by_ticker(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Regroup fixed size chunks of ticker ordered data into one frame per ticker.
+    """
+    remainder = None
+
+    for chunk in chunks:
+        if remainder is not None:
+            chunk = pd.concat([remainder, chunk], ignore_index=True)
+
+        # The last ticker in a chunk may continue in the next one
+        is_last = chunk[Daily.stock_id] == chunk[Daily.stock_id].iloc[-1]
+
+        for _, stock_df in chunk[~is_last].groupby(Daily.stock_id, sort=False):
+            yield stock_df.reset_index(drop=True)
+
+        remainder = chunk[is_last]
+
+    if remainder is not None:
+        yield remainder.reset_index(drop=True)
+
+
+def get_indices(request: schemas.RequestBase, calendar: MarketCalendar, frequency: str | None = None):
     if frequency is None:
         frequency = request.interval.key
 
-    if frequency.endswith("m"):
-        schedule = calendar.schedule(start_date=request.start_date, end_date=request.end_date, tz=calendar.tz)
-        indices = mcal.date_range(schedule, frequency=frequency)
-    else:
-        schedule = calendar.schedule(start_date=request.start_date, end_date=request.end_date, tz=None)
-        indices = schedule.index.tz_localize(calendar.tz)
-
-    return indices
+    return calendar.indices(request.start_date, request.end_date, frequency=frequency)
 
 
 # TODO: Solution to market tz and custom nytz (needed for pandera)
-@check_output(Daily.to_schema())
+@check_output(Daily.to_schema(), boundary=True)
 def create_fake_data(request: schemas.RequestBase, market: str = "NYSE") -> DataFrame[Daily]:
-    calendar = mcal.get_calendar(market)
-    timestamps = get_indices(request=request, calendar=calendar)
+    timestamps = get_indices(request=request, calendar=get_calendar(market, path=calendar_path))
 
     daily_df = get_empty_pandera_df(Daily)
 
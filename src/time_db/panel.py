@@ -0,0 +1,152 @@
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+
+from src.time_db.schemas import Backtest, Daily, as_nytz, nytz
+
+fields = (Daily.open, Daily.high, Daily.low, Daily.close, Daily.adj_close, Daily.volume)
+
+# Backtest columns and the Daily fields they are taken from (see daily_to_backtest)
+backtest_fields = {
+    Backtest.Open: Daily.open,
+    Backtest.High: Daily.high,
+    Backtest.Low: Daily.low,
+    Backtest.Close: Daily.adj_close,
+    Backtest.Volume: Daily.volume,
+}
+
+
+class Panel:
+    """
+    Wide format daily data: one 2-D float array (timestamps x tickers) per field, sharing a timestamp and ticker index.
+
+    Arrays are column major, so the values of a single ticker are contiguous and per ticker access is a view rather
+    than a groupby and copy of long format data. A mask marks which (timestamp, ticker) rows exist, so conversions to
+    and from Daily frames are lossless.
+    """
+
+    def __init__(
+        self,
+        index: pd.DatetimeIndex,
+        tickers: Iterable[str],
+        values: dict[str, np.ndarray],
+        mask: np.ndarray | None = None,
+    ):
+        self.index = index
+        self.tickers = pd.Index(tickers, name=Daily.stock_id)
+        self.values = {field: np.asfortranarray(values[field], dtype=float) for field in fields}
+        self.mask = np.asfortranarray(mask) if mask is not None else ~np.isnan(self.values[Daily.adj_close])
+
+    @classmethod
+    def from_daily(cls, data: DataFrame[Daily]) -> "Panel":
+        """
+        Pivot long format (Daily or CompactDaily) data to a panel, tickers and timestamps are sorted.
+        """
+        columns, tickers = pd.factorize(data[Daily.stock_id], sort=True)
+        rows, index = pd.factorize(data[Daily.timestamp], sort=True)
+        tickers, index = np.asarray(tickers, dtype=object), as_nytz(index)
+        shape = (len(index), len(tickers))
+
+        values = {}
+        for field in fields:
+            values[field] = np.full(shape, np.nan, order="F")
+            values[field][rows, columns] = data[field].to_numpy(dtype=float, na_value=np.nan)
+
+        mask = np.zeros(shape, dtype=bool, order="F")
+        mask[rows, columns] = True
+
+        return cls(pd.DatetimeIndex(index, name=Daily.timestamp), tickers, values, mask=mask)
+
+    def to_daily(self) -> DataFrame[Daily]:
+        """
+        Convert to long format data, ordered by ticker and timestamp.
+        """
+        # Column major order is ticker major, with ascending timestamps per ticker
+        positions = np.flatnonzero(self.mask.ravel(order="F"))
+        columns, rows = np.divmod(positions, len(self.index))
+
+        data = pd.DataFrame(
+            {
+                Daily.stock_id: self.tickers.to_numpy()[columns],
+                Daily.timestamp: self.index[rows],
+                **{field: self.values[field].ravel(order="F")[positions] for field in fields},
+            }
+        )
+        return data.astype({Daily.volume: _volume_dtype(data[Daily.volume]), Daily.timestamp: nytz})
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.values[field]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.index), len(self.tickers)
+
+    def column(self, field: str, ticker: str) -> np.ndarray:
+        """
+        View of the values of one field for one ticker, over the full panel index.
+        """
+        return self.values[field][:, self.tickers.get_loc(ticker)]
+
+    def view(self, ticker: str) -> dict[str, np.ndarray]:
+        """
+        Views of all fields for one ticker, over the full panel index.
+        """
+        position = self.tickers.get_loc(ticker)
+        return {field: self.values[field][:, position] for field in fields}
+
+    def select(self, tickers: Iterable[str]) -> "Panel":
+        """
+        Panel of a subset of tickers, in the given order.
+        """
+        tickers = list(tickers)
+        positions = self.tickers.get_indexer(tickers)
+
+        if (positions < 0).any():
+            raise KeyError(f"Tickers not in panel: {np.array(tickers)[positions < 0].tolist()}")
+
+        return Panel(
+            self.index,
+            self.tickers[positions],
+            {field: self.values[field][:, positions] for field in fields},
+            mask=self.mask[:, positions],
+        )
+
+    def to_backtest(self, ticker: str, dropna: bool = True) -> DataFrame[Backtest]:
+        """
+        Get the data of one ticker in backtesting format, equivalent to daily_to_backtest on the ticker's Daily frame.
+
+        Parameters
+        ----------
+        ticker: Ticker to convert.
+        dropna: Drop rows with any missing value, otherwise only rows missing from the panel are dropped.
+        """
+        view = self.view(ticker)
+        keep = self._rows(self.tickers.get_loc(ticker), dropna=dropna)
+
+        data = pd.DataFrame(
+            {column: view[field][keep] for column, field in backtest_fields.items()},
+            index=self.index[keep],
+        )
+        data[Backtest.Volume] = data[Backtest.Volume].astype(_volume_dtype(data[Backtest.Volume]))
+        data.insert(0, Backtest.stock_id, ticker)
+        return data
+
+    def _rows(self, position: int, dropna: bool) -> np.ndarray:
+        """
+        Mask of the rows of the ticker at a position, optionally excluding rows with any missing backtest value (close
+        is not used in backtests, so is dropped before missing values as in daily_to_backtest).
+        """
+        keep = self.mask[:, position]
+
+        if dropna:
+            values = np.column_stack([self.values[field][:, position] for field in backtest_fields.values()])
+            keep = keep & ~np.isnan(values).any(axis=1)
+
+        return keep
+
+
+def _volume_dtype(volume: pd.Series) -> type:
+    """Volumes are stored as floats in panels, restore integers when there are no missing values"""
+    return np.int64 if volume.notna().all() else float
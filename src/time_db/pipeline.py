@@ -0,0 +1,138 @@
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any
+
+_done = object()
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.rows = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, seconds: float):
+        with self._lock:
+            self.items += 1
+            self.rows += rows
+            self.busy += seconds
+
+    def throughput(self, wall: float) -> float:
+        """Rows per second of wall clock time"""
+        return self.rows / wall if wall else 0.0
+
+
+class PipelineStats:
+    def __init__(self, producers: int, consumers: int):
+        self.produce = StageStats("download", producers)
+        self.consume = StageStats("insert", consumers)
+        self.depths: list[int] = []
+        self.wall = 0.0
+
+    def report(self) -> str:
+        lines = [f"Pipeline finished in {self.wall:.1f}s"]
+
+        for stage in (self.produce, self.consume):
+            utilisation = stage.busy / (stage.workers * self.wall) if self.wall else 0
+            lines.append(
+                f"  {stage.name:>8}: {stage.items} items, {stage.rows} rows, "
+                f"{stage.throughput(self.wall):,.0f} rows/s, {utilisation:.0%} busy ({stage.workers} workers)"
+            )
+
+        if self.depths:
+            lines.append(f"  queue depth: max {max(self.depths)}, mean {sum(self.depths) / len(self.depths):.1f}")
+
+        return "\n".join(lines)
+
+
+def run_pipeline(
+    jobs: Iterable[Any],
+    produce: Callable[[Any], Any],
+    consume: Callable[[Any], None],
+    producers: int = 2,
+    consumers: int = 1,
+    queue_size: int = 8,
+    size: Callable[[Any], int] = len,
+) -> PipelineStats:
+    """
+    Run jobs through a producer/consumer pipeline: a pool of producer threads (e.g. downloads) feeds a bounded queue,
+    drained by a pool of consumer threads (e.g. database inserts), so both stages are kept busy at the same time.
+
+    On the first error in either stage, remaining jobs are skipped and the error is raised once running jobs finish.
+
+    Parameters
+    ----------
+    jobs: Inputs to the producer function.
+    produce: Function creating an item from a job, items that are None are skipped.
+    consume: Function processing an item.
+    producers: Number of producer threads.
+    consumers: Number of consumer threads.
+    queue_size: Maximum number of items waiting to be consumed, producers block when the queue is full.
+    size: Function returning the number of rows in an item, for throughput reporting.
+
+    Returns
+    -------
+    Per stage throughput and queue depth statistics.
+    """
+
+    work = queue.Queue(maxsize=queue_size)
+    stats = PipelineStats(producers=producers, consumers=consumers)
+    errors = []
+    stop = threading.Event()
+
+    def producer(job):
+        if stop.is_set():
+            return
+
+        start = perf_counter()
+        try:
+            item = produce(job)
+        except Exception:
+            stop.set()
+            raise
+
+        if item is not None:
+            stats.produce.add(size(item), perf_counter() - start)
+            work.put(item)
+            stats.depths.append(work.qsize())
+
+    def consumer():
+        while (item := work.get()) is not _done:
+            # Keep draining after a failure, so producers are never blocked on a full queue
+            if errors:
+                continue
+
+            start = perf_counter()
+            try:
+                consume(item)
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+                stop.set()
+            else:
+                stats.consume.add(size(item), perf_counter() - start)
+
+    start = perf_counter()
+
+    with ThreadPoolExecutor(consumers) as consumer_pool:
+        consumer_futures = [consumer_pool.submit(consumer) for _ in range(consumers)]
+
+        try:
+            with ThreadPoolExecutor(producers) as producer_pool:
+                for future in [producer_pool.submit(producer, job) for job in jobs]:
+                    future.result()
+        finally:
+            for _ in consumer_futures:
+                work.put(_done)
+
+    stats.wall = perf_counter() - start
+
+    if errors:
+        raise errors[0]
+
+    return stats
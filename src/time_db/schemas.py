@@ -1,5 +1,6 @@
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 import pandera as pa
 from pandera.typing import DataFrame, Series
@@ -23,6 +24,72 @@ class Daily(pa.DataFrameModel):
     volume: Series[int]
 
 
+class CompactDaily(pa.DataFrameModel):
+    """
+    Memory efficient Daily layout (see compact_daily): categorical tickers, float32 prices and timestamps as int64 UTC
+    epoch nanoseconds, converted to nytz only when needed (see get_timestamps).
+    """
+
+    stock_id: Series[pd.CategoricalDtype]
+    timestamp: Series[np.int64]
+    open: Series[np.float32]
+    high: Series[np.float32]
+    low: Series[np.float32]
+    close: Series[np.float32]
+    adj_close: Series[np.float32]
+    volume: Series[int]
+
+
+price_columns = [Daily.open, Daily.high, Daily.low, Daily.close, Daily.adj_close]
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return pd.api.types.is_integer_dtype(df[Daily.timestamp])
+
+
+def as_nytz(timestamps) -> pd.DatetimeIndex | pd.Series:
+    """
+    Convert timestamps to nytz, from int64 UTC epoch nanoseconds, naive market times or any timezone.
+    """
+    timestamps = pd.to_datetime(timestamps, utc=pd.api.types.is_integer_dtype(timestamps))
+    accessor = timestamps.dt if isinstance(timestamps, pd.Series) else timestamps
+
+    if accessor.tz is None:
+        return accessor.tz_localize(nytz.tz)
+
+    return accessor.tz_convert(nytz.tz)
+
+
+def get_timestamps(df: pd.DataFrame) -> pd.Series:
+    """Timestamps of Daily or CompactDaily data as nytz"""
+    return as_nytz(df[Daily.timestamp])
+
+
+def compact_daily(df: DataFrame[Daily]) -> DataFrame[CompactDaily]:
+    """
+    Convert Daily data to the compact layout, float32 prices keep about 7 significant digits.
+    """
+    if is_compact(df):
+        return df
+
+    timestamps = get_timestamps(df).dt.tz_convert("UTC").astype(np.int64)
+    return df.assign(**{Daily.timestamp: timestamps}).astype(
+        {Daily.stock_id: "category", **{column: np.float32 for column in price_columns}}
+    )
+
+
+def expand_daily(df: DataFrame[CompactDaily]) -> DataFrame[Daily]:
+    """
+    Convert compact data back to the Daily layout.
+    """
+    if not is_compact(df):
+        return df
+
+    return df.assign(**{Daily.timestamp: get_timestamps(df)}).astype(
+        {Daily.stock_id: str, **{column: float for column in price_columns}}
+    )
+
+
 class Backtest(pa.DataFrameModel):
     stock_id: Series[str]
     Open: Series[float]
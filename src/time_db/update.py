@@ -1,15 +1,24 @@
-from pandarallel import pandarallel
-from pandera import check_input
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import numpy as np
 from pandera.typing import DataFrame
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from config import settings
 from src.api.main import FinanceApi
+from src.db.cache import ArrowCache, RequestCache, request_cache
+from src.db.schemas import RequestBase
 from src.time_db import crud, models
 from src.time_db.database import engine
-from src.time_db.schemas import Daily, StockBase
+from src.time_db.pipeline import run_pipeline
+from src.time_db.schemas import Daily, StockBase, nytz
+from src.time_db.validation import check_input
 from utils.gen import chunk
 
-pandarallel.initialize()
+logger = logging.getLogger(__name__)
 
 
 @check_input(Daily.to_schema(), "data")
@@ -22,10 +31,53 @@ def insert_ohlc_data(ticker: str, data: DataFrame[Daily]):
         # Create the stock if it does not exist
         stock_record = crud.create_record(models.Stock, data=stock.model_dump())
 
-    crud.create_records(models.Daily, data.to_dict("records"))
+    if data.shape[0] >= settings.bulk_insert_rows:
+        crud.copy_records(models.Daily, data)
+    else:
+        crud.create_records(models.Daily, data.to_dict("records"))
+
+
+def get_watermarks(stocks: list[str]) -> dict[str, datetime]:
+    """
+    Get the latest stored timestamp of each ticker in a single grouped query, tickers with no data are omitted.
+    """
+    with Session(engine) as session:
+        rows = (
+            session.query(models.Daily.stock_id, func.max(models.Daily.timestamp))
+            .filter(models.Daily.stock_id.in_(stocks))
+            .group_by(models.Daily.stock_id)
+            .all()
+        )
+
+    return dict(rows)
 
 
-def update_daily(stocks: list[str] | None = None):
+def update_daily(
+    stocks: list[str] | None = None,
+    period: str = "1y",
+    downloaders: int = 1,
+    writers: int = 1,
+    queue_size: int = 8,
+    cache: ArrowCache | None = None,
+    result_cache: RequestCache | None = request_cache,
+):
+    """
+    Download and store sessions since the latest stored session (watermark) of each ticker. Tickers sharing a
+    watermark are requested together, tickers with no stored data are requested over the given period.
+
+    Downloads and inserts run concurrently in a pipeline (see run_pipeline). yfinance is not thread safe, so downloads
+    are serialised (see FinanceApi._download) and overlap with inserts but not with each other.
+
+    Parameters
+    ----------
+    stocks: Tickers to update, all stored tickers if None.
+    period: Period requested for tickers with no stored data.
+    downloaders: Number of download threads.
+    writers: Number of insert threads.
+    queue_size: Maximum number of downloads waiting to be inserted.
+    cache: On disk cache of stored data to invalidate with inserted data, as read through by DatabaseApi.
+    result_cache: In process cache of request results to invalidate with inserted tickers.
+    """
     api = FinanceApi()
 
     if stocks is None:
@@ -34,15 +86,62 @@ def update_daily(stocks: list[str] | None = None):
 
         stocks = [s.ticker for s in stocks]
 
-    for chunked in chunk(stocks, size=10):
-        data = api.request(chunked, period="1y")
+    watermarks = get_watermarks(stocks)
+
+    groups = defaultdict(list)
+    for stock in stocks:
+        watermark = watermarks.get(stock)
+        start = watermark.astimezone(nytz.tz).date() + timedelta(days=1) if watermark else None
+        groups[start].append(stock)
+
+    # End date is exclusive, so today's session is included
+    end = datetime.now(tz=nytz.tz).date() + timedelta(days=1)
 
+    jobs = [
+        (start, chunked)
+        for start, group in groups.items()
+        # Skip tickers that are up to date, or with only weekend days since the watermark
+        if start is None or np.busday_count(start, end) > 0
+        for chunked in chunk(group, size=10)
+    ]
+
+    def download(job):
+        start, chunked = job
+
+        if start is None:
+            return api.request(chunked, period=period)
+
+        request = RequestBase(
+            stock=chunked,
+            period=None,
+            start_date=datetime.combine(start, time(), tzinfo=nytz.tz),
+            end_date=datetime.combine(end, time(), tzinfo=nytz.tz),
+        )
+        return api.make_request(request, by_date=True)
+
+    def insert(data):
         for stock, stock_df in data.groupby(Daily.stock_id):
             stock_df = stock_df.dropna()
 
             if not stock_df.empty:
                 insert_ohlc_data(ticker=stock, data=stock_df)
 
+                if cache is not None:
+                    cache.invalidate(stock_df)
+
+                if result_cache is not None:
+                    result_cache.invalidate([stock])
+
+    stats = run_pipeline(
+        jobs,
+        produce=download,
+        consume=insert,
+        producers=downloaders,
+        consumers=writers,
+        queue_size=queue_size,
+    )
+    logger.info(stats.report())
+
 
 if __name__ == "__main__":
     update_daily(["MMM", "AAPL"])
@@ -0,0 +1,59 @@
+import inspect
+
+import pandas as pd
+import pandera as pa
+import wrapt
+
+from config import settings
+from src.time_db.schemas import CompactDaily, Daily, is_compact
+
+
+def validate(data: pd.DataFrame | None, schema: pa.DataFrameSchema, boundary: bool = False) -> pd.DataFrame | None:
+    """
+    Validate data against a schema according to the configured validation mode (see Settings.validation_mode).
+
+    Parameters
+    ----------
+    data: Frame to validate, None is passed through.
+    schema: Schema to validate against, compact Daily data is validated against CompactDaily instead.
+    boundary: Whether data enters the application here (e.g. an API response), the only place it is validated in
+        "ingest" mode.
+    """
+    mode = settings.validation_mode
+
+    if data is None or (mode == "ingest" and not boundary):
+        return data
+
+    if schema.name == Daily.__name__ and is_compact(data):
+        schema = CompactDaily.to_schema()
+
+    if mode == "sampled" and data.shape[0] > settings.validation_sample_rows:
+        return schema.validate(data, sample=settings.validation_sample_rows)
+
+    return schema.validate(data)
+
+
+def check_output(schema: pa.DataFrameSchema, boundary: bool = False):
+    """
+    Validate the output of the decorated function, following the configured validation mode (see validate).
+    """
+
+    @wrapt.decorator
+    def wrapper(func, instance, args, kwargs):
+        return validate(func(*args, **kwargs), schema, boundary=boundary)
+
+    return wrapper
+
+
+def check_input(schema: pa.DataFrameSchema, arg_name: str, boundary: bool = False):
+    """
+    Validate an argument of the decorated function, following the configured validation mode (see validate).
+    """
+
+    @wrapt.decorator
+    def wrapper(func, instance, args, kwargs):
+        arguments = inspect.signature(func).bind(*args, **kwargs)
+        arguments.arguments[arg_name] = validate(arguments.arguments[arg_name], schema, boundary=boundary)
+        return func(*arguments.args, **arguments.kwargs)
+
+    return wrapper
@@ -0,0 +1,94 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from config import settings
+
+
+class ComputeCache:
+    """
+    In process, size bounded LRU cache of computation results, keyed on a computation key (e.g. component class and
+    parameters) and a fingerprint of the input data.
+
+    Results are copied in and out of the cache, so callers are free to modify them.
+    """
+
+    def __init__(self, max_bytes: int = settings.indicator_cache_mb * 2**20):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.sizes: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, data: Any, func: Callable[[Any], Any], data_key: tuple | None = None) -> Any:
+        """
+        Get the result of func(data) from the cache, computing and caching it if missing.
+
+        Parameters
+        ----------
+        key: Key identifying the computation, equal keys and input data must give equal results.
+        data: Input data (array or pandas object).
+        func: Function computing the result from the data.
+        data_key: Fingerprint of the data if already known (see fingerprint), to look up many keys on the same data.
+        """
+        full_key = (key, fingerprint(data) if data_key is None else data_key)
+
+        if full_key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(full_key)
+            return self.entries[full_key].copy()
+
+        self.misses += 1
+        result = func(data)
+        self.put(full_key, result)
+        return result
+
+    def put(self, key: Hashable, result: Any):
+        size = get_size(result)
+
+        if size > self.max_bytes:
+            return
+
+        self.remove(key)
+        self.entries[key] = result.copy()
+        self.sizes[key] = size
+
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key: Hashable):
+        self.entries.pop(key, None)
+        self.sizes.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes.values())
+
+
+def fingerprint(data: Any) -> tuple:
+    """
+    Fingerprint of the values of an array or pandas object, labels (e.g. the index) are not included.
+    """
+    values = np.ascontiguousarray(data.to_numpy() if isinstance(data, pd.Series | pd.DataFrame) else data)
+    return values.shape, values.dtype.str, hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+
+def get_size(result: Any) -> int:
+    if isinstance(result, pd.Series | pd.DataFrame):
+        return int(np.sum(result.memory_usage(deep=True)))
+
+    return np.asarray(result).nbytes
+
+
+# Cache shared by all indicators of the process
+indicator_cache = ComputeCache()
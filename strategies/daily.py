@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 from backtesting import Backtest, Strategy
-from backtesting.lib import TrailingStrategy, crossover
+from backtesting.lib import TrailingStrategy
 from backtesting.test import GOOG
 
 
@@ -20,18 +20,22 @@ class SmaCross(Strategy):
         self.sma1 = self.I(simple_moving_avg, self.data.Close, self.n1)
         self.sma2 = self.I(simple_moving_avg, self.data.Close, self.n2)
 
+        # Precompute the crossover events, next only reads the current bar
+        self.long_entry, self.short_entry = cross_events(self.sma1, self.sma2)
+
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
         # If sma1 crosses above sma2, close any existing
         # short trades, and buy the asset
-        if crossover(self.sma1, self.sma2):
+        if self.long_entry[index]:
             self.position.close()
             self.buy()
 
         # Else, if sma1 crosses below sma2, close any existing
         # long trades, and sell the asset
-        elif crossover(self.sma2, self.sma1):
+        elif self.short_entry[index]:
             self.position.close()
             self.sell()
 
@@ -45,20 +49,22 @@ class MacdSignalCross(TrailingStrategy):
 
         # Precompute macd and signal
         self.macd, self.signal = self.I(macd_signal, self.data.Close)
+        self.long_entry, self.short_entry = cross_events(self.macd, self.signal)
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
         # If macd crosses above signal, close any existing
         # short trades, and buy the asset
-        if crossover(self.macd, self.signal):
+        if self.long_entry[index]:
             self.position.close()
             self.buy()
 
         # Else, if macd crosses below signal, close any existing
         # long trades, and sell the asset
-        elif crossover(self.signal, self.macd):
+        elif self.short_entry[index]:
             self.position.close()
             self.sell()
 
@@ -75,16 +81,18 @@ class MacdDerivCross(TrailingStrategy):
         # Precompute macd and signal
         self.macd = self.I(macd, self.data.Close, name="MACD")
         self.macd_deriv, self.signal = self.I(macd_deriv_signal, self.macd, name="MACD'")
+        self.long_entry, self.short_entry = cross_events(self.macd_deriv, self.signal)
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
-        if crossover(self.macd_deriv, self.signal):
+        if self.long_entry[index]:
             self.position.close()
             self.buy()
 
-        elif crossover(self.signal, self.macd_deriv):
+        elif self.short_entry[index]:
             self.position.close()
             self.sell()
 
@@ -101,16 +109,18 @@ class MacdGradCross(TrailingStrategy):
         # Precompute macd and signal
         self.macd = self.I(macd, self.data.Close, name="MACD")
         self.macd_grad, self.signal = self.I(macd_grad_signal, self.macd, name="MACD'")
+        self.long_entry, self.short_entry = cross_events(self.macd_grad, self.signal)
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
-        if crossover(self.macd_grad, self.signal):
+        if self.long_entry[index]:
             self.position.close()
             self.buy()
 
-        elif crossover(self.signal, self.macd_grad):
+        elif self.short_entry[index]:
             self.position.close()
             self.sell()
 
@@ -131,28 +141,20 @@ class MacdGradDerivCross(TrailingStrategy):
         self.macd = self.I(macd, self.data.Close, name="MACD")
         self.macd_grad, self.macd_deriv = self.I(macd_grad_deriv, self.macd, name="MACD'", smooth=self.smooth)
         self.signal = np.zeros(self.macd.shape) + self.threshold
+        self.long_entry, self.short_entry = grad_deriv_events(self.macd_grad, self.macd_deriv, self.threshold)
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
-        if (
-            crossover(self.macd_grad, self.signal)
-            and self.macd_deriv[-1] >= self.threshold
-            or crossover(self.macd_deriv, self.signal)
-            and self.macd_grad[-1] >= self.threshold
-        ):
+        if self.long_entry[index]:
             self.position.close()
 
             if self.buy_sell in [0, 2]:
                 self.buy()
 
-        elif (
-            crossover(-self.signal, self.macd_grad)
-            and self.macd_deriv[-1] <= -self.threshold
-            or crossover(-self.signal, self.macd_deriv)
-            and self.macd_grad[-1] <= -self.threshold
-        ):
+        elif self.short_entry[index]:
             self.position.close()
 
             if self.buy_sell in [1, 2]:
@@ -176,16 +178,18 @@ class MacdGradCheat(TrailingStrategy):
         self.macd = self.I(macd, self.data.Close, name="MACD")
         self.macd_grad = self.I(pd.Series, np.gradient(self.macd), name="MACD'")
         self.signal = self.I(pd.Series, np.zeros(self.macd.shape), name="Zero")
+        self.long_entry, self.short_entry = cross_events(self.macd_grad, self.signal)
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
+        index = len(self.data) - 1
 
-        if crossover(self.macd_grad, self.signal):
+        if self.long_entry[index]:
             self.position.close()
             self.buy()
 
-        elif crossover(self.signal, self.macd_grad):
+        elif self.short_entry[index]:
             self.position.close()
             self.sell()
 
@@ -195,7 +199,7 @@ def simple_moving_avg(values, n):
     Return simple moving average of values, at
     each step taking into account n previous values.
     """
-    return pd.Series(values).rolling(n).mean()
+    return to_pandas(values).rolling(n).mean()
 
 
 def macd_signal(values, smooth: int = 9, **kwargs):
@@ -238,9 +242,14 @@ def macd(values, n_fast: int = 12, n_slow: int = 26):
     Return MACD (Moving Average Convergence/Divergence)
     using fast and slow exponential moving averages.
     """
-    emaslow = pd.Series(values).ewm(span=n_slow, adjust=False).mean()
-    emafast = pd.Series(values).ewm(span=n_fast, adjust=False).mean()
-    return emafast - emaslow
+    return ema(values, n_fast) - ema(values, n_slow)
+
+
+def ema(values, span: int):
+    """
+    Return exponential moving average (adjust=False) of values.
+    """
+    return to_pandas(values).ewm(span=span, adjust=False).mean()
 
 
 def smoother(func, _smooth: int = 9, *args, **kwargs):
@@ -249,18 +258,65 @@ def smoother(func, _smooth: int = 9, *args, **kwargs):
 
 def macd_deriv(values, **kwargs):
     md = macd(values, **kwargs)
-    return pd.Series(md).diff()
+    return md.diff()
 
 
 def macd_grad(values, **kwargs):
     md = macd(values, **kwargs)
-    return pd.Series(np.gradient(md))
+    return to_pandas(np.gradient(md, axis=0))
 
 
 def threshold_signal(shape, threshold: float):
     return np.zeros(shape) + threshold
 
 
+def crossovers(series1, series2) -> np.ndarray:
+    """
+    Vectorised crossover, whether series1 just crossed over (above) series2 at each step, as returned by crossover
+    when called at that step. Values may be 2-D (steps x tickers), or a number for a constant series.
+    """
+    series1, series2 = np.broadcast_arrays(np.asarray(series1, dtype=float), np.asarray(series2, dtype=float))
+
+    crossed = np.zeros(series1.shape, dtype=bool)
+    crossed[1:] = (series1[:-1] < series2[:-1]) & (series1[1:] > series2[1:])
+    return crossed
+
+
+def cross_events(series1, series2) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Long and short entries of a crossover strategy at each step: series1 crossing over series2, and series2 crossing
+    over series1 (when not also a long entry, as checked second).
+    """
+    long = crossovers(series1, series2)
+    return long, crossovers(series2, series1) & ~long
+
+
+def grad_deriv_events(grad, deriv, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Long and short entries of MacdGradDerivCross at each step: MACD gradient or derivative crossing over the threshold
+    while the other is above it, or crossing under minus the threshold while the other is below it.
+    """
+    grad, deriv = np.asarray(grad, dtype=float), np.asarray(deriv, dtype=float)
+
+    with np.errstate(invalid="ignore"):
+        long = (crossovers(grad, threshold) & (deriv >= threshold)) | (
+            crossovers(deriv, threshold) & (grad >= threshold)
+        )
+        short = (crossovers(-threshold, grad) & (deriv <= -threshold)) | (
+            crossovers(-threshold, deriv) & (grad <= -threshold)
+        )
+
+    return long, short & ~long
+
+
+def to_pandas(values) -> pd.Series | pd.DataFrame:
+    """
+    Series of 1-D values, or frame of 2-D values (steps x tickers), so indicators can be computed for many tickers at
+    once.
+    """
+    return pd.DataFrame(values) if np.ndim(values) == 2 else pd.Series(values)
+
+
 if __name__ == "__main__":
     bt = Backtest(GOOG, MacdSignalCross, cash=10_000, commission=0.002)
     stats = bt.run()
@@ -0,0 +1,101 @@
+import operator
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from strategies import daily
+from strategies.cache import ComputeCache, fingerprint, indicator_cache
+
+
+class Node(NamedTuple):
+    """
+    Computation in an indicator graph: a function of the results of its input nodes, with keyword parameters.
+
+    Nodes are values, equal nodes (same function, inputs and parameters) are the same computation, so indicators
+    declaring the same intermediate (e.g. an EMA) share it and it is evaluated once per dataset.
+    """
+
+    func: Callable[..., Any] | None
+    inputs: tuple["Node", ...] = ()
+    params: tuple[tuple[str, Any], ...] = ()
+
+
+# Input data of a graph, e.g. close prices
+source = Node(None)
+
+
+def node(func: Callable[..., Any], *inputs: Node, **params) -> Node:
+    return Node(func, inputs, tuple(sorted(params.items())))
+
+
+class Graph:
+    """
+    Evaluation of indicator nodes on one dataset, computing each distinct node once.
+
+    Results are kept for the lifetime of the graph and shared by all nodes using them, so they must not be modified.
+    They are also cached across graphs (e.g. optimisation trials on the same data) in a ComputeCache.
+    """
+
+    def __init__(self, data: Any, cache: ComputeCache | None = indicator_cache):
+        """
+        Parameters
+        ----------
+        data: Input data of the source node.
+        cache: Cache of node results across graphs, None to only share results within the graph.
+        """
+        self.data = data
+        self.cache = cache
+        self.data_key = None if cache is None else fingerprint(data)
+        self.results: dict[Node, Any] = {source: data}
+
+    def __getitem__(self, item: Node) -> Any:
+        if item not in self.results:
+            self.results[item] = self.compute(item)
+
+        return self.results[item]
+
+    def evaluate(self, nodes: Iterable[Node]) -> list[Any]:
+        return [self[item] for item in nodes]
+
+    def compute(self, item: Node) -> Any:
+        def func(_):
+            return item.func(*self.evaluate(item.inputs), **dict(item.params))
+
+        if self.cache is None:
+            return func(self.data)
+
+        return self.cache.get(item, self.data, func, data_key=self.data_key)
+
+
+def ema(data: Node, span: int) -> Node:
+    return node(daily.ema, data, span=span)
+
+
+def macd(data: Node, n_fast: int = 12, n_slow: int = 26) -> Node:
+    return node(operator.sub, ema(data, n_fast), ema(data, n_slow))
+
+
+def diff(data: Node) -> Node:
+    return node(_diff, data)
+
+
+def ewm_mean(data: Node, span: int) -> Node:
+    return node(_ewm_mean, data, span=span)
+
+
+def constant(data: Node, value: float) -> Node:
+    return node(_constant, data, value=value)
+
+
+def _diff(values) -> pd.Series:
+    return daily.to_pandas(values).diff()
+
+
+def _ewm_mean(values, span: int) -> pd.Series:
+    return daily.to_pandas(values).ewm(span=span).mean()
+
+
+def _constant(values, value: float) -> pd.Series:
+    return pd.Series(np.zeros(np.shape(values)) + value)
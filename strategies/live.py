@@ -1,10 +1,7 @@
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 
-from utils.gen import pct_change
-
-matplotlib.use("TkAgg")
+from strategies.streaming import PctChange, RollingMean
 
 
 class LiveStrategy:
@@ -15,63 +12,114 @@ class LiveStrategy:
     loss_stop = -0.0015
     investment = 10
 
-    opened_at = None
-    profit = 0
-
-    result = []
-
-    def __init__(self, verbosity: int = 1):
+    def __init__(self, verbosity: int = 0):
         self.verbosity = verbosity
-
-    def main(self, data):
-        transaction = np.full([data.shape[0] + 1], "none", dtype="<U4")
-
-        for i, window in enumerate(data.rolling(window=self.lookback_period)):
-            transaction[i] = self.strategy(window["Adj Close"])
-            if self.verbosity >= 1 and i < data.shape[0]:
-                c = "r" if transaction[i] in ("hold", "buy") else "k"
-
-                plt.plot(data["Adj Close"].iloc[i : i + 2], c=c)
-
-                if transaction[i] in ("buy", "sell"):
-                    plt.scatter(data.index[i], data["Adj Close"].iloc[i], c=c, marker="x")
-
-                plt.pause(0.1)
+        self.opened_at = None
+        self.profit = 0
+        # Percentage changes over the lookback window, updated with each price
+        self.pct_change = PctChange()
+        self.mean_change = RollingMean(self.lookback_period - 1)
+
+    def main(self, data: pd.DataFrame) -> float:
+        """
+        Evaluate the strategy over all adjusted close prices, and plot its transactions if verbose (the figure is not
+        shown, see plot).
+        """
+        transaction, profit = self.evaluate(data["Adj Close"])
+        self.profit += profit
+
+        if self.verbosity >= 1:
+            self.plot(data.assign(Transaction=transaction))
 
         return self.profit
 
-    def strategy(self, price_list):
+    def evaluate(self, prices: pd.Series | np.ndarray) -> tuple[np.ndarray, float]:
+        """
+        Transaction ("none", "buy", "hold" or "sell") at each bar and total profit of the strategy over a price series,
+        starting without an open position, without plotting. Equal to calling update with each price.
+        """
+        transactions, profit = self.evaluate_batch(pd.DataFrame({"prices": np.asarray(prices, dtype=float)}))
+        return transactions["prices"].to_numpy(), float(profit["prices"])
+
+    def evaluate_batch(self, prices: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        Transactions and profits of the strategy over many price series at once (bars x tickers), see evaluate.
+
+        Changes over each lookback window are computed up front, with the same arithmetic as the streaming indicators of
+        update, so stepping through bars only updates positions, for all tickers at once.
+        """
+        values = prices.to_numpy(dtype=float)
+        n_bars, n_tickers = values.shape
+        start = self.lookback_period - 1
+
+        transactions = np.full(values.shape, "none", dtype="<U4")
+        profit = np.zeros(n_tickers)
+
+        if n_bars > start:
+            series = pd.DataFrame(values)
+            pct_change = 100 * series.diff() / series.shift()
+            change = (self.lookback_period - 1) * pct_change.rolling(self.lookback_period - 1).mean().to_numpy()
+            opened_at = np.full(n_tickers, np.nan)
+
+            for i in range(start, n_bars):
+                is_open = ~np.isnan(opened_at)
+                change_since_buy = 100 * (values[i] - opened_at) / opened_at
+
+                buy = ~is_open & (change[i] > self.entry)
+                sell = is_open & ((change_since_buy > self.profit_stop) | (change_since_buy < self.loss_stop))
+
+                profit[sell] += change_since_buy[sell] * self.investment
+                transactions[i, is_open] = "hold"
+                transactions[i, buy] = "buy"
+                transactions[i, sell] = "sell"
+
+                opened_at[buy] = values[i, buy]
+                opened_at[sell] = np.nan
+
+        return (
+            pd.DataFrame(transactions, index=prices.index, columns=prices.columns),
+            pd.Series(profit, index=prices.columns),
+        )
+
+    def update(self, price: float) -> str:
+        """
+        Transaction at a new price, updating the open position and profit, in constant time for live trading.
+        """
+        price = float(price)
+        change = (self.lookback_period - 1) * self.mean_change.update(self.pct_change.update(price))
         res = "none"
 
-        if len(price_list) >= self.lookback_period:
-            lookback_prices = price_list.to_numpy()
-            change = pct_change(lookback_prices)
-
-            # TODO: cumprod(pct_change + 1) - 1 used here for some reason?
-            if self.opened_at is None:
-                if sum(change) > self.entry:
-                    self.opened_at = price_list[-1]
-                    res = "buy"
+        if self.opened_at is None:
+            if change > self.entry:
+                self.opened_at = price
+                res = "buy"
+        else:
+            change_since_buy = 100 * (price - self.opened_at) / self.opened_at
+
+            if change_since_buy > self.profit_stop or change_since_buy < self.loss_stop:
+                self.profit += change_since_buy * self.investment
+                self.opened_at = None
+                res = "sell"
             else:
-                prices = np.array([self.opened_at, price_list[-1]])
-                change_since_buy = pct_change(prices)
-
-                if change_since_buy[0] > self.profit_stop or change_since_buy[0] < self.loss_stop:
-                    self.profit += change_since_buy * self.investment
-                    self.opened_at = None
-                    res = "sell"
-                else:
-                    res = "hold"
+                res = "hold"
 
         return res
 
-    def plot(self, data):
+    def plot(self, data: pd.DataFrame):
+        """
+        Figure of adjusted close prices with the buy and sell transactions in data["Transaction"] (see evaluate), not
+        shown so callers are not blocked. Imports matplotlib only when called.
+        """
         # TODO: Remove and make generic plotting functions for all strategies in a super class.
-        plt.gcf()
-        plt.plot(data["Adj Close"], c="b")
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots()
+        ax.plot(data["Adj Close"], c="b")
+
+        buy = data.loc[data["Transaction"] == "buy", "Adj Close"]
+        sell = data.loc[data["Transaction"] == "sell", "Adj Close"]
 
-        buy = data.loc[data["Transaction"] == "buy"]
-        sell = data.loc[data["Transaction"] == "sell"]
+        ax.scatter(buy.index, buy, marker="^", c="g")
+        ax.scatter(sell.index, sell, marker="v", c="k")
 
-        plt.scatter(buy.index, buy, marker="^", c="g")
-        plt.scatter(sell.index, sell, marker="^", c="k")
+        return fig
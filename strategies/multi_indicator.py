@@ -5,7 +5,8 @@ from backtesting.lib import TrailingStrategy
 from backtesting.test import GOOG
 from hyperopt import hp
 
-from strategies.daily import macd
+from strategies import graph
+from strategies.graph import Graph, Node, source
 
 
 class Tunable:
@@ -35,6 +36,10 @@ class Indicator(Tunable):
         super().__init__(**params)
 
     def __call__(self, data: pd.Series) -> pd.Series:
+        return Graph(data)[self.node(source)]
+
+    def node(self, data: Node) -> Node:
+        """Graph node of the indicator of some data"""
         pass
 
 
@@ -43,6 +48,10 @@ class Signal(Tunable):
         super().__init__(**params)
 
     def __call__(self, data: pd.Series) -> pd.Series:
+        return Graph(data)[self.node(source)]
+
+    def node(self, indicator: Node) -> Node:
+        """Graph node of the signal of an indicator"""
         pass
 
 
@@ -51,8 +60,8 @@ class Threshold(Signal):
         super().__init__(value=value)
         self.scale = scale
 
-    def __call__(self, data: pd.Series) -> pd.Series:
-        return pd.Series(np.zeros(data.shape) + (self.scale * self.params["value"]))
+    def node(self, indicator: Node) -> Node:
+        return graph.constant(indicator, self.scale * self.params["value"])
 
     def get_param_space(self):
         return {"value": hp.uniform("value", -0.05, 0.05)}
@@ -62,29 +71,28 @@ class Macd(Indicator):
     def __init__(self, n_fast: int = 12, n_slow: int = 26):
         super().__init__(n_fast=n_fast, n_slow=n_slow)
 
-    def __call__(self, data: pd.Series):
-        emaslow = pd.Series(data).ewm(span=self.params["n_slow"], adjust=False).mean()
-        emafast = pd.Series(data).ewm(span=self.params["n_fast"], adjust=False).mean()
-        return emafast - emaslow
+    def node(self, data: Node) -> Node:
+        return graph.macd(data, n_fast=self.params["n_fast"], n_slow=self.params["n_slow"])
 
 
 class MacdSignal(Signal):
     def __init__(self, smooth: int = 9):
         super().__init__(smooth=smooth)
 
-    def __call__(self, macd: pd.Series) -> pd.Series:
-        return macd.ewm(span=self.params["smooth"], adjust=False).mean()
+    def node(self, indicator: Node) -> Node:
+        return graph.ema(indicator, self.params["smooth"])
 
 
 class MacdDeriv(Indicator):
     def __init__(self, n_fast: int = 12, n_slow: int = 26, smooth: int = 9):
         super().__init__(n_fast=n_fast, n_slow=n_slow, smooth=smooth)
 
-    def __call__(self, data: pd.Series) -> pd.Series:
-        md = macd(data, n_fast=self.params["n_fast"], n_slow=self.params["n_slow"]).diff()
+    def node(self, data: Node) -> Node:
+        # Shares the MACD (and EMAs) of any other component with the same spans
+        md = graph.diff(graph.macd(data, n_fast=self.params["n_fast"], n_slow=self.params["n_slow"]))
 
         if self.params["smooth"]:
-            md = md.ewm(span=self.params["smooth"]).mean()
+            md = graph.ewm_mean(md, self.params["smooth"])
 
         return md
 
@@ -97,9 +105,12 @@ class SignalIndicator:
         self.signal_param_key = self.signal.__class__.__name__
 
     def __call__(self, data):
-        ind = self.indicator(data)
-        signal = self.signal(ind)
-        return ind, signal
+        return tuple(Graph(data).evaluate(self.nodes(source)))
+
+    def nodes(self, data: Node) -> tuple[Node, Node]:
+        """Graph nodes of the indicator of some data and of its signal"""
+        ind = self.indicator.node(data)
+        return ind, self.signal.node(ind)
 
     def set_params(self, **kwargs):
         if self.indicator_param_key in kwargs and kwargs[self.indicator_param_key] is not None:
@@ -128,52 +139,68 @@ class MultiSignalIndicator:
     def get_params(self, hyper=False):
         return {k: v.get_params(hyper) for k, v in zip(self.param_keys, self.signal_indicators, strict=True)}
 
+    def __call__(self, data) -> list[tuple[pd.Series, pd.Series]]:
+        """
+        Indicator and signal of each signal indicator, evaluated on one graph so shared intermediates (e.g. EMAs of
+        equal spans) are computed once.
+        """
+        data_graph = Graph(data)
+        return [tuple(data_graph.evaluate(si.nodes(source))) for si in self.signal_indicators]
+
 
 class MultiIndicatorStrategy(TrailingStrategy):
     msi: MultiSignalIndicator = None
 
     def init(self):
         super().init()
-        self.prev_signals = np.zeros(len(self.msi.signal_indicators))
 
         self.indicators = []
         self.signals = []
-        for si in self.msi.signal_indicators:
+        for si, outputs in zip(self.msi.signal_indicators, self.msi(self.data.Close), strict=True):
             # Wrapping in an indicator to reveal one at a time and plot
-            i, s = self.I(si, self.data.Close)
+            i, s = self.I(_outputs, *outputs, name=[si.indicator_param_key, si.signal_param_key])
             self.indicators.append(i)
             self.signals.append(s)
 
+        # Signal of each indicator at each bar (bars x indicators), so next only looks up the current bar
+        self.signal_matrix = get_signal_matrix(np.transpose(self.indicators), np.transpose(self.signals))
+        self.all_above = (self.signal_matrix > 0).all(axis=1)
+        self.all_below = (self.signal_matrix < 0).all(axis=1)
+        self.prev_above = self.prev_below = False
+
         self.set_trailing_sl(2)
 
     def next(self):
         super().next()
 
-        signals = self.get_signals()
+        index = len(self.data) - 1
+        above, below = self.all_above[index], self.all_below[index]
 
         # Look for all above, plus one just above (previously below)
-        if all(signals > 0) and not all(self.prev_signals > 0):
+        if above and not self.prev_above:
             self.position.close()
             self.buy()
 
-        elif all(signals < 0) and not all(self.prev_signals < 0):
+        elif below and not self.prev_below:
             self.position.close()
             self.sell()
 
-        self.prev_signals = signals
+        self.prev_above, self.prev_below = above, below
 
     def get_signals(self):
-        signals = []
-        for i, s in zip(self.indicators, self.signals, strict=True):
-            # TODO: Only for threshold signals
-            if i > s:
-                signals.append(1)
-            elif i < -s:
-                signals.append(-1)
-            else:
-                signals.append(0)
-
-        return np.array(signals)
+        return self.signal_matrix[len(self.data) - 1]
+
+
+def _outputs(*values):
+    return values
+
+
+def get_signal_matrix(indicators: np.ndarray, signals: np.ndarray) -> np.ndarray:
+    """
+    Signal of indicators (bars x indicators): 1 when above their signal, -1 when below minus their signal, else 0.
+    """
+    # TODO: Only for threshold signals
+    return np.where(indicators > signals, 1, np.where(indicators < -signals, -1, 0))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,326 @@
+import math
+from collections import deque
+from collections.abc import Iterable
+
+import numpy as np
+
+nan = float("nan")
+
+
+class StreamingIndicator:
+    """
+    Indicator updated one bar at a time, in constant time per bar.
+
+    Each update returns the indicator value at the new bar, equal (to the bit) to the value of the equivalent batch
+    function over the whole series so far, so live strategies can be driven tick by tick for many tickers (one
+    instance per ticker) without recomputing over a window. Missing values (NaN) are handled as by pandas.
+    """
+
+    def update(self, value: float) -> float:
+        pass
+
+    def reset(self):
+        pass
+
+    def stream(self, values: Iterable[float]) -> np.ndarray:
+        """
+        Update with each value in turn, returning all outputs, e.g. to warm up from history.
+        """
+        return np.array([self.update(value) for value in values], dtype=float)
+
+
+class Ema(StreamingIndicator):
+    """
+    Exponential moving average, as ewm(span=span, adjust=False).mean().
+    """
+
+    def __init__(self, span: float):
+        # Same arithmetic as pandas, which converts span to centre of mass
+        self.alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        self.reset()
+
+    def reset(self):
+        self.value = nan
+        # Weight of the current value, decays over missing values
+        self.old_weight = 1.0
+
+    def update(self, value: float) -> float:
+        value = float(value)
+
+        if self.value == self.value:
+            self.old_weight *= 1.0 - self.alpha
+
+            if value == value:
+                if self.value != value:
+                    self.value = (self.old_weight * self.value + self.alpha * value) / (self.old_weight + self.alpha)
+                self.old_weight = 1.0
+
+        elif value == value:
+            self.value = value
+
+        return self.value
+
+
+class Diff(StreamingIndicator):
+    """
+    Difference to the previous value, as Series.diff().
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.previous = nan
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        out = value - self.previous
+        self.previous = value
+        return out
+
+
+class PctChange(StreamingIndicator):
+    """
+    Percentage change from the previous value, as 100 * diff() / shift() (see utils.gen.pct_change).
+    """
+
+    def __init__(self):
+        self.diff = Diff()
+
+    def reset(self):
+        self.diff.reset()
+
+    def update(self, value: float) -> float:
+        previous = self.diff.previous
+        return 100 * self.diff.update(value) / previous
+
+
+class Macd(StreamingIndicator):
+    """
+    MACD, as daily.macd.
+    """
+
+    def __init__(self, n_fast: int = 12, n_slow: int = 26):
+        self.fast = Ema(n_fast)
+        self.slow = Ema(n_slow)
+
+    def reset(self):
+        self.fast.reset()
+        self.slow.reset()
+
+    def update(self, value: float) -> float:
+        return self.fast.update(value) - self.slow.update(value)
+
+
+class MacdSignal(StreamingIndicator):
+    """
+    MACD and its signal line, as daily.macd_signal, updates return both.
+    """
+
+    def __init__(self, smooth: int = 9, n_fast: int = 12, n_slow: int = 26):
+        self.macd = Macd(n_fast=n_fast, n_slow=n_slow)
+        self.signal = Ema(smooth)
+
+    def reset(self):
+        self.macd.reset()
+        self.signal.reset()
+
+    def update(self, value: float) -> tuple[float, float]:
+        md = self.macd.update(value)
+        return md, self.signal.update(md)
+
+    def stream(self, values: Iterable[float]) -> np.ndarray:
+        """
+        Update with each value in turn, returning all outputs as a (bars x 2) array of MACD and signal.
+        """
+        return np.array([self.update(value) for value in values], dtype=float).reshape(-1, 2)
+
+
+class MacdDeriv(StreamingIndicator):
+    """
+    Bar to bar change of MACD, as daily.macd_deriv.
+    """
+
+    def __init__(self, n_fast: int = 12, n_slow: int = 26):
+        self.macd = Macd(n_fast=n_fast, n_slow=n_slow)
+        self.diff = Diff()
+
+    def reset(self):
+        self.macd.reset()
+        self.diff.reset()
+
+    def update(self, value: float) -> float:
+        return self.diff.update(self.macd.update(value))
+
+
+class _Window:
+    """
+    Last n values, with the number of them that are not missing.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values: deque[float] = deque()
+        self.n_obs = 0
+
+    def push(self, value: float) -> float:
+        """
+        Add a value, returning the value leaving the window (NaN if none).
+        """
+        self.values.append(value)
+        self.n_obs += value == value
+
+        removed = self.values.popleft() if len(self.values) > self.n else nan
+        self.n_obs -= removed == removed
+        return removed
+
+
+class _RollingExtreme(StreamingIndicator):
+    """
+    Rolling extreme over the last n values, kept in a monotonic deque of (bar, value) candidates. Missing values are
+    skipped, outputs are missing until the window holds n values, as rolling(n) in pandas.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self.bar = -1
+        self.window = _Window(self.n)
+        self.candidates: deque[tuple[int, float]] = deque()
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        self.bar += 1
+        self.window.push(value)
+
+        if self.candidates and self.candidates[0][0] <= self.bar - self.n:
+            self.candidates.popleft()
+
+        if value == value:
+            while self.candidates and not self.before(self.candidates[-1][1], value):
+                self.candidates.pop()
+            self.candidates.append((self.bar, value))
+
+        return self.candidates[0][1] if self.window.n_obs >= self.n else nan
+
+    @staticmethod
+    def before(candidate: float, value: float) -> bool:
+        """Whether an older candidate stays ahead of a newer value"""
+        pass
+
+
+class RollingMax(_RollingExtreme):
+    """
+    Rolling maximum, as rolling(n).max().
+    """
+
+    @staticmethod
+    def before(candidate: float, value: float) -> bool:
+        return candidate > value
+
+
+class RollingMin(_RollingExtreme):
+    """
+    Rolling minimum, as rolling(n).min().
+    """
+
+    @staticmethod
+    def before(candidate: float, value: float) -> bool:
+        return candidate < value
+
+
+class RollingMean(StreamingIndicator):
+    """
+    Rolling mean, as rolling(n).mean().
+
+    Follows the pandas running sum, with compensated (Kahan) summation of added and removed values and the same
+    corrections for constant and single signed windows, so results are equal to the bit.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self.window = _Window(self.n)
+        self.sum = 0.0
+        self.add_compensation = 0.0
+        self.remove_compensation = 0.0
+        self.n_negative = 0
+        self.n_same = 0
+        self.previous = nan
+        self.first = True
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        removed = self.window.push(value)
+
+        # Pandas restarts the sum when windows don't overlap, i.e. windows of one value
+        if self.first or self.n == 1:
+            self.sum = self.add_compensation = self.remove_compensation = 0.0
+            self.n_negative = self.n_same = 0
+            self.previous = value
+            self.first = False
+        elif removed == removed:
+            self.sum, self.remove_compensation = kahan_add(self.sum, -removed, self.remove_compensation)
+            self.n_negative -= math.copysign(1, removed) < 0
+
+        if value == value:
+            self.sum, self.add_compensation = kahan_add(self.sum, value, self.add_compensation)
+            self.n_negative += math.copysign(1, value) < 0
+            self.n_same = self.n_same + 1 if value == self.previous else 1
+            self.previous = value
+
+        n_obs = self.window.n_obs
+        if n_obs < self.n or n_obs == 0:
+            return nan
+
+        if self.n_same >= n_obs:
+            return self.previous
+
+        mean = self.sum / n_obs
+        if (self.n_negative == 0 and mean < 0) or (self.n_negative == n_obs and mean > 0):
+            return 0.0
+
+        return mean
+
+
+def kahan_add(total: float, value: float, compensation: float) -> tuple[float, float]:
+    """
+    Add a value to a compensated sum, returning the new sum and compensation.
+    """
+    y = value - compensation
+    t = total + y
+    return t, t - total - y
+
+
+class Atr(StreamingIndicator):
+    """
+    Average true range, as used by TrailingStrategy (see src.analysis.vectorised.get_atr), without filling the first
+    n values backwards, which are missing. Updates take the high, low and close of a bar.
+    """
+
+    def __init__(self, n: int = 100):
+        self.mean = RollingMean(n)
+        self.reset()
+
+    def reset(self):
+        self.mean.reset()
+        self.previous_close = nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev_close = self.previous_close
+        self.previous_close = float(close)
+
+        # Missing if any range is, as np.max
+        ranges = (high - low, abs(prev_close - high), abs(prev_close - low))
+        true_range = nan if any(r != r for r in ranges) else max(ranges)
+        return self.mean.update(true_range)
+
+    def stream(self, high: Iterable[float], low: Iterable[float], close: Iterable[float]) -> np.ndarray:
+        """
+        Update with each bar in turn, returning all outputs.
+        """
+        return np.array([self.update(*bar) for bar in zip(high, low, close, strict=True)], dtype=float)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from benchmarks.data import fake_daily
+from src.analysis.cross_validation import cross_validate, reduce_stats
+from src.analysis.prepared import PreparedDataset
+
+
+def fit_mean_close(data, train, test):
+    """Toy fold fit: the "parameter" is the number of train tickers, stats are each test ticker's mean close"""
+    stats = pd.DataFrame(
+        {
+            "Mean Close": [data[ticker]["Close"].mean() for ticker in test],
+            "Label": test,
+            "_frame": [data[ticker] for ticker in test],
+        },
+        index=test,
+    )
+    return {"n_train": len(train)}, stats
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return PreparedDataset(fake_daily(n_tickers=10, n_days=50))
+
+
+def test_results_layout(dataset):
+    results = cross_validate(dataset, fit_mean_close, n_splits=5, n_jobs=1, seed=0)
+
+    assert results.index.names == ["fold", "stock_id"]
+    assert sorted(results.index.get_level_values("stock_id")) == sorted(dataset.tickers)
+    assert list(results.columns) == [("params", "n_train"), ("stats", "Mean Close"), ("stats", "Label")]
+    assert (results[("params", "n_train")] == 8).all()
+
+    for (_, ticker), mean_close in results[("stats", "Mean Close")].items():
+        assert mean_close == dataset[ticker]["Close"].mean()
+
+
+def test_workers_match_serial(dataset):
+    serial = cross_validate(dataset, fit_mean_close, n_splits=5, n_jobs=1, seed=0)
+    parallel = cross_validate(dataset, fit_mean_close, n_splits=5, n_jobs=2, seed=0)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_reduce_stats(dataset):
+    results = cross_validate(dataset, fit_mean_close, n_splits=5, n_jobs=1, seed=0)
+    reduced = reduce_stats(results)
+
+    assert list(reduced.index) == list(range(5))
+    assert list(reduced.columns) == [("params", "n_train"), ("stats", "Mean Close")]
+    pd.testing.assert_series_equal(
+        reduced[("stats", "Mean Close")],
+        results[("stats", "Mean Close")].groupby(level="fold").mean(),
+    )
@@ -0,0 +1,43 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+from benchmarks.data import fake_daily
+from src.analysis.parallel import SharedPanel, map_tickers, view_panel
+from src.time_db.panel import Panel, fields
+from strategies.daily import MacdGradDerivCross
+
+
+def run_backtest(data, strategy, **kwargs):
+    return Backtest(data, strategy, cash=1000, commission=0.002).run(**kwargs)
+
+
+def test_shared_panel():
+    panel = Panel.from_daily(fake_daily(n_tickers=3, n_days=20))
+
+    with SharedPanel(panel) as shared:
+        attached = view_panel(shared.memory, shared.spec)
+
+        assert attached.index.equals(panel.index)
+        assert attached.tickers.equals(panel.tickers)
+        for field in fields:
+            assert np.array_equal(attached[field], panel[field])
+            assert np.shares_memory(attached[field], np.asarray(shared.memory.buf))
+
+
+def test_map_tickers_matches_serial():
+    panel = Panel.from_daily(fake_daily(n_tickers=4, n_days=252))
+    func = partial(run_backtest, strategy=MacdGradDerivCross, smooth=3)
+
+    results = map_tickers(panel, func, n_jobs=2)
+
+    assert list(results) == list(panel.tickers)
+    for ticker, stats in results.items():
+        expected = func(panel.to_backtest(ticker))
+        frames = ["_strategy", "_equity_curve", "_trades"]
+
+        pd.testing.assert_series_equal(stats.drop(frames), expected.drop(frames))
+        pd.testing.assert_frame_equal(stats["_trades"], expected["_trades"])
+        pd.testing.assert_frame_equal(stats["_equity_curve"], expected["_equity_curve"])
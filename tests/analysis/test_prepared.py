@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from backtesting import Backtest
+
+from benchmarks.data import fake_daily
+from src.analysis.prepared import PreparedDataset, get_panel
+from src.time_db.panel import Panel
+from strategies.daily import SmaCross
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return Panel.from_daily(fake_daily(n_tickers=3, n_days=100))
+
+
+def test_frames_match_panel(panel):
+    dataset = PreparedDataset(panel)
+
+    assert list(dataset) == list(panel.tickers)
+    assert get_panel(dataset) is panel
+    for ticker, frame in dataset.items():
+        pd.testing.assert_frame_equal(frame, panel.to_backtest(ticker))
+
+
+def test_frames_are_read_only(panel):
+    frame = PreparedDataset(panel)["FAKE0"]
+
+    with pytest.raises(ValueError, match="read-only"):
+        frame.iloc[0, 1] = 0.0
+
+    with pytest.raises(ValueError, match="read-only"):
+        frame["Close"].to_numpy()[0] = 0.0
+
+
+def test_select_shares_frames(panel):
+    dataset = PreparedDataset(panel)
+    selected = dataset.select(["FAKE2", "FAKE0"])
+
+    assert list(selected) == ["FAKE2", "FAKE0"]
+    assert selected["FAKE0"] is dataset["FAKE0"]
+
+
+def test_backtest_on_prepared_frames(panel):
+    dataset = PreparedDataset(panel)
+    frames = ["_strategy", "_equity_curve", "_trades"]
+
+    stats = Backtest(dataset["FAKE1"], SmaCross, cash=1000, commission=0.002).run()
+    expected = Backtest(panel.to_backtest("FAKE1"), SmaCross, cash=1000, commission=0.002).run()
+
+    pd.testing.assert_series_equal(stats.drop(frames), expected.drop(frames))
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from backtesting import Backtest
+
+from benchmarks.data import fake_daily
+from src.analysis import vectorised
+from src.time_db.panel import Panel
+from strategies import daily
+
+
+@pytest.fixture(scope="module")
+def panel():
+    data = fake_daily(n_tickers=3, n_days=300)
+    # Tickers with a late start and a gap
+    late = data.index[data["stock_id"] == "FAKE1"][:40]
+    gap = data.index[data["stock_id"] == "FAKE2"][150:160]
+    # Close is not used in backtests
+    data.loc[data.index[data["stock_id"] == "FAKE0"][100], "close"] = np.nan
+    return Panel.from_daily(data.drop(late.append(gap)))
+
+
+@pytest.mark.parametrize(
+    ("strategy", "params"),
+    [
+        (daily.SmaCross, {"n1": 5, "n2": 30}),
+        (daily.MacdSignalCross, {}),
+        (daily.MacdDerivCross, {}),
+        (daily.MacdGradCross, {}),
+        (daily.MacdGradDerivCross, {"smooth": 3, "threshold": 0.05, "buy_sell": 2}),
+        (daily.MacdGradDerivCross, {"buy_sell": 0}),
+        (daily.MacdGradCheat, {}),
+    ],
+)
+def test_matches_backtest(panel, strategy, params):
+    stats = vectorised.run(panel, strategy, params)
+
+    assert list(stats.index) == list(panel.tickers)
+    for ticker in panel.tickers:
+        expected = Backtest(panel.to_backtest(ticker), strategy, cash=1000, commission=0.002).run(**params)
+        assert expected["# Trades"] > 0
+
+        for column in stats.columns:
+            assert np.isclose(stats.loc[ticker, column], expected[column], rtol=1e-9, equal_nan=True), column
+
+
+def test_params_not_set_on_strategy(panel):
+    vectorised.run(panel, daily.SmaCross, {"n1": 3})
+    assert daily.SmaCross.n1 == 10
+
+    with pytest.raises(AttributeError):
+        vectorised.run(panel, daily.SmaCross, {"n3": 3})
+
+
+def test_unsupported_strategy(panel):
+    with pytest.raises(ValueError, match="No vectorised signals"):
+        vectorised.run(panel, daily.Strategy)
+
+
+def test_crossovers():
+    series = np.array([[1.0, 3.0], [3.0, 1.0], [1.0, 3.0], [np.nan, 2.0]])
+
+    assert daily.crossovers(series, 2).tolist() == [[False, False], [True, False], [False, True], [False, False]]
+    assert daily.crossovers(2, series)[:, 1].tolist() == [False, True, False, False]
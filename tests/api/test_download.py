@@ -0,0 +1,31 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.api import main
+
+
+def test_downloads_serialised(monkeypatch):
+    lock = threading.Lock()
+    active = [0]
+    overlaps = []
+
+    def download(tickers, **kwargs):
+        with lock:
+            active[0] += 1
+            overlaps.append(active[0] > 1)
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return pd.DataFrame({"Close": [1.0]})
+
+    monkeypatch.setattr(main.yf, "download", download)
+    monkeypatch.setattr(main.rate.rate_limiter, "acquire", lambda: None)
+    api = main.FinanceApi()
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda ticker: api._download([ticker]), ["A", "B", "C", "D"]))
+
+    assert overlaps == [False] * 4
@@ -0,0 +1,41 @@
+import multiprocessing as mp
+from time import monotonic
+
+import pytest
+
+from src.api.rate import TokenBucket
+
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+
+    # Full bucket allows a burst of requests without waiting
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+    # Then requests are spaced at the refill rate
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits == pytest.approx([0.05, 0.1, 0.15], abs=0.01)
+
+
+def _acquire_times(bucket, n, results):
+    for _ in range(n):
+        bucket.acquire()
+        results.put(monotonic())
+
+
+def test_shared_between_processes():
+    bucket = TokenBucket(rate=50, capacity=1)
+    context = mp.get_context("fork")
+    results = context.Queue()
+
+    processes = [context.Process(target=_acquire_times, args=(bucket, 5, results)) for _ in range(2)]
+    start = monotonic()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    times = sorted(results.get() for _ in range(10))
+
+    # Ten requests from two processes at 50/s with no burst take at least 9 intervals
+    assert times[-1] - start >= 9 / 50 - 0.01
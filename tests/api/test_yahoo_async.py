@@ -0,0 +1,70 @@
+import asyncio
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.api import rate
+from src.api.main import AsyncYahooApi, parse_spark
+from src.db import schemas
+from src.time_db.schemas import Daily
+
+payload = json.loads((Path(__file__).parent / "data" / "spark.json").read_text())
+
+
+@pytest.fixture(autouse=True)
+def _no_rate_limit(monkeypatch):
+    monkeypatch.setattr(rate, "rate_limiter", rate.TokenBucket(rate=1000, capacity=100))
+
+
+def make_app(stats: dict) -> web.Application:
+    """Stand-in spark endpoint, serving the recorded payload for the requested symbols"""
+
+    async def spark(request: web.Request) -> web.Response:
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        stats["connections"].add(request.transport.get_extra_info("peername"))
+
+        await asyncio.sleep(0.01)
+        symbols = request.query["symbols"].split(",")
+
+        stats["in_flight"] -= 1
+        return web.json_response({symbol: payload[symbol] for symbol in symbols})
+
+    app = web.Application()
+    app.router.add_get("/v8/finance/spark", spark)
+    return app
+
+
+async def get_stock_history(request: schemas.RequestBase, stats: dict, **kwargs) -> pd.DataFrame:
+    async with TestServer(make_app(stats)) as server, AsyncYahooApi(str(server.make_url("/")), **kwargs) as api:
+        api.max_stocks_per_request = 1
+        return await api.get_stock_history(request)
+
+
+def test_get_stock_history():
+    stats = {"in_flight": 0, "max_in_flight": 0, "connections": set()}
+    request = schemas.RequestBase(stock=list(payload), period="5d")
+
+    data = asyncio.run(get_stock_history(request, stats, concurrency=2))
+
+    # One batch per symbol, at most two in flight, reusing pooled connections
+    assert stats["max_in_flight"] == 2
+    assert len(stats["connections"]) <= 2
+
+    assert list(data.columns) == list(Daily.to_schema().columns)
+    assert data.groupby(Daily.stock_id).size().to_dict() == {symbol: 5 for symbol in payload}
+
+
+def test_parse_spark():
+    data = parse_spark({"MSFT": payload["MSFT"]})
+
+    assert (data[Daily.timestamp] == data[Daily.timestamp].dt.normalize()).all()
+    assert data[Daily.timestamp].iloc[0] == pd.Timestamp("2022-08-01", tz="America/New_York")
+    assert np.isnan(data[Daily.close].iloc[2])
+    assert data[Daily.adj_close].equals(data[Daily.close])
+    assert data[Daily.volume].isna().all()
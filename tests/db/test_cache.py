@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+from pandas import testing
+
+from src.db import schemas
+from src.db.cache import ArrowCache, RequestCache
+from src.time_db.schemas import Daily, nytz
+
+
+@pytest.fixture()
+def stored_data():
+    timestamps = pd.bdate_range("2021-06-01", "2022-08-31", tz=nytz.tz)
+    frames = [
+        pd.DataFrame(
+            {
+                Daily.stock_id: ticker,
+                Daily.timestamp: timestamps,
+                Daily.open: 1.0,
+                Daily.high: 2.0,
+                Daily.low: 0.5,
+                Daily.close: 1.5,
+                Daily.adj_close: 1.5,
+                Daily.volume: 100,
+            }
+        )
+        for ticker in ["A", "B"]
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture()
+def loader(stored_data):
+    def load(request: schemas.RequestBase):
+        load.calls += 1
+        start = pd.Timestamp(request.start_date.date(), tz="UTC")
+        end = pd.Timestamp(request.end_date.date(), tz="UTC") + pd.Timedelta(days=1)
+        mask = (
+            stored_data[Daily.stock_id].isin(request.stock)
+            & (stored_data[Daily.timestamp] >= start)
+            & (stored_data[Daily.timestamp] < end)
+        )
+        return stored_data[mask]
+
+    load.calls = 0
+    return load
+
+
+def test_read_through(tmp_path, loader, fake_year_request):
+    cache = ArrowCache(path=tmp_path)
+    request = fake_year_request.model_copy(update={"stock": ["A", "B"]})
+
+    first = cache.get(request, loader=loader)
+    second = cache.get(request, loader=loader)
+
+    # One load per year of partitions on the first read only
+    assert loader.calls == 2
+    testing.assert_frame_equal(first, second)
+
+    expected = loader(request).reset_index(drop=True)
+    testing.assert_frame_equal(first, expected)
+
+
+def test_columns(tmp_path, loader, fake_month_request):
+    cache = ArrowCache(path=tmp_path)
+    data = cache.get(fake_month_request.model_copy(update={"stock": ["A"]}), loader=loader, columns=[Daily.close])
+
+    assert list(data.columns) == [Daily.close]
+    assert data.shape[0] > 0
+
+
+def test_invalidate(tmp_path, loader, stored_data, fake_month_request):
+    cache = ArrowCache(path=tmp_path)
+    request = fake_month_request.model_copy(update={"stock": ["A", "B"]})
+    cache.get(request, loader=loader)
+
+    cache.invalidate(stored_data[stored_data[Daily.stock_id] == "A"].tail(1))
+
+    assert not cache.partition_path("A", 2022).exists()
+    assert cache.partition_path("B", 2022).exists()
+
+    cache.get(request, loader=loader)
+    assert loader.calls == 2
+
+
+def test_request_cache_superset(stored_data, fake_year_request, fake_month_request):
+    cache = RequestCache()
+    year_request = fake_year_request.model_copy(update={"stock": ["A", "B"]})
+    month_request = fake_month_request.model_copy(update={"stock": ["A"]})
+
+    assert cache.get(year_request) is None
+
+    cache.put(year_request, stored_data)
+    data = cache.get(month_request)
+
+    assert set(data[Daily.stock_id]) == {"A"}
+    assert data[Daily.timestamp].min().date() >= month_request.start_date.date()
+    assert data[Daily.timestamp].max().date() <= month_request.end_date.date()
+
+    # Month data does not cover the year
+    cache.clear()
+    cache.put(month_request, data)
+    assert cache.get(year_request) is None
+
+
+def test_request_cache_eviction(stored_data, fake_year_request):
+    requests = [fake_year_request.model_copy(update={"stock": [ticker]}) for ticker in ["A", "B"]]
+    frames = [stored_data[stored_data[Daily.stock_id] == ticker] for ticker in ["A", "B"]]
+
+    cache = RequestCache(max_bytes=int(frames[0].memory_usage(deep=True).sum() * 1.5))
+
+    for request, frame in zip(requests, frames, strict=True):
+        cache.put(request, frame)
+
+    # Least recently used entry evicted
+    assert cache.get(requests[0]) is None
+    assert cache.get(requests[1]) is not None
+    assert cache.size <= cache.max_bytes
+
+
+def test_request_cache_invalidate(stored_data, fake_year_request):
+    cache = RequestCache()
+    request = fake_year_request.model_copy(update={"stock": ["A", "B"]})
+    cache.put(request, stored_data)
+
+    cache.invalidate(["B"])
+
+    assert cache.get(request) is None
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from sqlalchemy import delete, select
+
+from src.time_db import crud, models
+from src.time_db.database import engine
+
+ticker = "COPYTEST"
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture()
+def stock():
+    if not crud.get_record_by_filter(models.Stock, {"ticker": ticker}):
+        crud.create_record(models.Stock, {"ticker": ticker})
+
+    def clear():
+        with engine.begin() as connection:
+            connection.execute(delete(models.Daily.__table__).where(models.Daily.stock_id == ticker))
+
+    clear()
+    yield ticker
+    clear()
+
+
+def make_rows(start: int, stop: int, price: float = 1.0) -> pd.DataFrame:
+    timestamps = pd.date_range("2022-01-03", periods=stop, freq="D", tz="America/New_York")[start:]
+    return pd.DataFrame(
+        {
+            "stock_id": ticker,
+            "timestamp": timestamps,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "adj_close": price,
+            "volume": range(start, stop),
+        }
+    )
+
+
+def read_rows() -> pd.DataFrame:
+    table = models.Daily.__table__
+    query = select(table.c.timestamp, table.c.close, table.c.volume).where(table.c.stock_id == ticker)
+
+    with engine.connect() as connection:
+        return pd.read_sql(query.order_by(table.c.timestamp), connection)
+
+
+def test_copy_records_chunks(stock):
+    data = make_rows(0, 25)
+    crud.copy_records(models.Daily, data, chunk_size=10)
+
+    stored = read_rows()
+    assert stored["volume"].tolist() == list(range(25))
+    assert (stored["timestamp"] == data["timestamp"].dt.tz_convert("UTC")).all()
+
+
+def test_copy_records_duplicates(stock):
+    crud.copy_records(models.Daily, make_rows(0, 10), chunk_size=4)
+
+    # Overlaps stored rows, and repeats new rows across a chunk boundary
+    data = pd.concat([make_rows(5, 15, price=2.0), make_rows(12, 15, price=3.0)], ignore_index=True)
+    crud.copy_records(models.Daily, data, chunk_size=4)
+
+    stored = read_rows()
+    assert stored["volume"].tolist() == list(range(15))
+    # Existing rows are kept, the first of repeated new rows is inserted
+    assert stored["close"].tolist() == [1.0] * 10 + [2.0] * 5
@@ -0,0 +1,122 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.db import schemas
+from src.db.main import DatabaseApi, get_indices
+from src.time_db.schemas import Daily
+
+
+def make_rows(ticker: str, timestamps: pd.DatetimeIndex) -> pd.DataFrame:
+    n = len(timestamps)
+    price = 100 + np.arange(n, dtype=float)
+    rows = pd.DataFrame(
+        {
+            Daily.stock_id: ticker,
+            Daily.timestamp: timestamps,
+            Daily.open: price,
+            Daily.high: price + 1,
+            Daily.low: price - 1,
+            Daily.close: price,
+            Daily.adj_close: price,
+            Daily.volume: np.arange(n) + 1_000,
+        }
+    )
+    return Daily.validate(rows)
+
+
+@pytest.fixture()
+def database_api(fake_month_request):
+    api = DatabaseApi(api=MagicMock(), result_cache=None)
+    api.put_data = MagicMock()
+    return api
+
+
+@pytest.fixture()
+def sessions(database_api, fake_month_request):
+    return get_indices(fake_month_request, database_api.calendar)
+
+
+def serve(rows: pd.DataFrame):
+    """API returning the given rows within the requested dates (end exclusive)"""
+
+    def make_request(request: schemas.RequestBase, **kwargs):
+        timestamps = rows[Daily.timestamp]
+        in_range = (timestamps >= request.start_date) & (timestamps < request.end_date)
+        return rows[in_range & rows[Daily.stock_id].isin(request.stock)].reset_index(drop=True)
+
+    return make_request
+
+
+def test_full_hit(database_api, fake_month_request, sessions):
+    stored = make_rows("FAKE", sessions)
+    database_api.get_db_data = MagicMock(return_value=stored)
+
+    data = database_api.get_data(fake_month_request)
+
+    database_api.api.make_request.assert_not_called()
+    pd.testing.assert_frame_equal(data, stored)
+
+
+def test_partial_hole(database_api, fake_month_request, sessions):
+    rows = make_rows("FAKE", sessions)
+    hole = rows.index[5:10]
+    database_api.get_db_data = MagicMock(return_value=rows.drop(hole).reset_index(drop=True))
+    database_api.api.make_request.side_effect = serve(rows)
+
+    data = database_api.get_data(fake_month_request)
+
+    ((request,), _) = database_api.api.make_request.call_args
+    assert database_api.api.make_request.call_count == 1
+    assert request.start_date == sessions[5]
+    pd.testing.assert_frame_equal(data, rows)
+    pd.testing.assert_frame_equal(database_api.put_data.call_args[0][0], rows.loc[hole].reset_index(drop=True))
+
+
+def test_unfillable_hole(database_api, fake_month_request, sessions):
+    # No data before listing, nor on a halted session, the API only returns the stored sessions
+    rows = make_rows("FAKE", sessions)
+    stored = rows.drop(rows.index[:5]).drop(rows.index[12]).reset_index(drop=True)
+    database_api.get_db_data = MagicMock(return_value=stored)
+    database_api.api.make_request.side_effect = serve(stored)
+
+    data = database_api.get_data(fake_month_request)
+
+    assert database_api.api.make_request.call_count == 2
+    database_api.put_data.assert_not_called()
+    pd.testing.assert_frame_equal(data, stored)
+
+    # Holes already requested are not requested again
+    pd.testing.assert_frame_equal(database_api.get_data(fake_month_request), stored)
+    assert database_api.api.make_request.call_count == 2
+
+
+def test_partial_fill(database_api, fake_month_request, sessions):
+    # The API only returns some of the missing sessions, e.g. an unfinished session or a halt
+    rows = make_rows("FAKE", sessions)
+    database_api.get_db_data = MagicMock(return_value=rows.drop(rows.index[5:10]).reset_index(drop=True))
+    available = rows.drop(rows.index[[5, 7, 9]]).reset_index(drop=True)
+    database_api.api.make_request.side_effect = serve(available)
+
+    data = database_api.get_data(fake_month_request)
+
+    pd.testing.assert_frame_equal(data, available)
+    pd.testing.assert_frame_equal(database_api.put_data.call_args[0][0], rows.loc[[6, 8]].reset_index(drop=True))
+
+
+def test_force_refetches(database_api, fake_month_request, sessions):
+    rows = make_rows("FAKE", sessions)
+    stored = rows.drop(rows.index[:5]).reset_index(drop=True)
+    database_api.get_db_data = MagicMock(return_value=stored)
+    database_api.api.make_request.side_effect = serve(stored)
+    database_api.get_data(fake_month_request)
+
+    # Now available from the API, a forced request fetches the whole range again
+    database_api.api.make_request.side_effect = serve(rows)
+    data = database_api.get_data(fake_month_request, force=True)
+
+    ((request,), _) = database_api.api.make_request.call_args
+    assert request.start_date == sessions[0]
+    pd.testing.assert_frame_equal(data, rows)
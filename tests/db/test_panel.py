@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.data import fake_daily
+from src.time_db.panel import Panel
+from src.time_db.schemas import Daily, compact_daily, daily_to_backtest
+
+
+@pytest.fixture()
+def data():
+    data = fake_daily(n_tickers=4, n_days=20)
+    # Missing rows and values, in no particular order
+    data.loc[3, Daily.open] = np.nan
+    # Close is not used in backtests, so rows missing only close are kept
+    data.loc[8, Daily.close] = np.nan
+    return data.drop(index=[5, 30]).sample(frac=1, random_state=0)
+
+
+def test_round_trip(data):
+    panel = Panel.from_daily(data)
+
+    assert panel.shape == (20, 4)
+    pd.testing.assert_frame_equal(
+        panel.to_daily(),
+        data.sort_values([Daily.stock_id, Daily.timestamp]).reset_index(drop=True),
+    )
+
+
+def test_views(data):
+    panel = Panel.from_daily(data)
+    column = panel.column(Daily.close, "FAKE1")
+
+    assert np.shares_memory(column, panel[Daily.close])
+    assert column.flags.c_contiguous
+
+
+def test_to_backtest(data):
+    panel = Panel.from_daily(data)
+
+    for stock, stock_df in data.sort_values(Daily.timestamp).groupby(Daily.stock_id):
+        # Close is dropped by daily_to_backtest before missing values, its value is irrelevant
+        expected = daily_to_backtest(stock_df.fillna({Daily.close: 0.0}).dropna())
+        pd.testing.assert_frame_equal(panel.to_backtest(stock), expected)
+
+    assert data.loc[8, Daily.timestamp] in panel.to_backtest(data.loc[8, Daily.stock_id]).index
+
+
+def test_select(data):
+    panel = Panel.from_daily(data).select(["FAKE2", "FAKE0"])
+
+    assert list(panel.tickers) == ["FAKE2", "FAKE0"]
+    pd.testing.assert_frame_equal(panel.to_backtest("FAKE0"), Panel.from_daily(data).to_backtest("FAKE0"))
+
+    with pytest.raises(KeyError):
+        panel.select(["FAKE1"])
+
+
+def test_from_compact(data):
+    pd.testing.assert_frame_equal(
+        Panel.from_daily(compact_daily(data)).to_daily(),
+        Panel.from_daily(data).to_daily(),
+        rtol=1e-6,
+    )
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from src.time_db.pipeline import run_pipeline
+
+
+def test_pipeline_consumes_all():
+    consumed = []
+
+    stats = run_pipeline(
+        range(20),
+        produce=lambda job: list(range(job)) if job % 5 else None,
+        consume=consumed.append,
+        producers=3,
+        consumers=2,
+        queue_size=2,
+    )
+
+    assert sorted(len(item) for item in consumed) == [job for job in range(20) if job % 5]
+    assert stats.produce.items == stats.consume.items == len(consumed)
+    assert stats.consume.rows == sum(len(item) for item in consumed)
+    assert max(stats.depths) <= 2
+
+
+def test_pipeline_overlaps_stages():
+    def produce(job):
+        time.sleep(0.05)
+        return [job]
+
+    def consume(item):
+        time.sleep(0.05)
+
+    stats = run_pipeline(range(8), produce=produce, consume=consume, producers=1, consumers=1)
+
+    # Serial would take 0.8s, overlapping stages should take about half that
+    assert stats.wall < 0.7
+
+
+def test_pipeline_consumer_error():
+    def consume(item):
+        raise ValueError("Insert failed")
+
+    with pytest.raises(ValueError, match="Insert failed"):
+        run_pipeline(range(10), produce=lambda job: [job], consume=consume, queue_size=1)
+
+
+def test_pipeline_stops_after_error():
+    produced = []
+
+    def produce(job):
+        produced.append(job)
+        return [job]
+
+    def consume(item):
+        raise ValueError("Insert failed")
+
+    with pytest.raises(ValueError, match="Insert failed"):
+        run_pipeline(range(100), produce=produce, consume=consume, producers=2, queue_size=1)
+
+    # Only jobs started before the failure, and those blocked on the full queue, are downloaded
+    assert len(produced) < 10
+
+
+def test_pipeline_producer_error():
+    produced = []
+
+    def produce(job):
+        produced.append(job)
+        if job == 0:
+            raise ValueError("Download failed")
+        return [job]
+
+    with pytest.raises(ValueError, match="Download failed"):
+        run_pipeline(range(100), produce=produce, consume=lambda item: None, producers=1)
+
+    assert produced == [0]
@@ -1,8 +1,14 @@
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
+import pandas as pd
+import pandera as pa
 import pytest
 
+from benchmarks.data import fake_daily
 from src.db import schemas
+from src.time_db.schemas import Daily, compact_daily, expand_daily, get_timestamps
+from src.time_db.validation import validate
 
 today = datetime.now(tz=timezone.utc)
 delta = timedelta(days=30)
@@ -71,3 +77,20 @@ def test_too_large_interval():
             start_date="2000-01-01",
             end_date="2000-01-01",
         )
+
+
+def test_compact_daily():
+    data = fake_daily(n_tickers=3, n_days=10)
+    compact = compact_daily(data)
+
+    assert compact[Daily.stock_id].dtype == "category"
+    assert compact[Daily.timestamp].dtype == np.int64
+    assert compact[Daily.close].dtype == np.float32
+
+    # Compact data is validated against the compact schema
+    validate(compact, Daily.to_schema())
+    with pytest.raises(pa.errors.SchemaError):
+        validate(compact.astype({Daily.close: float}), Daily.to_schema())
+
+    assert get_timestamps(compact).equals(data[Daily.timestamp])
+    pd.testing.assert_frame_equal(expand_daily(compact), data, rtol=1e-6)
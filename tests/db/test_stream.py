@@ -0,0 +1,67 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.db import schemas
+from src.db.main import get_daily_query, split_by_ticker
+from src.time_db.schemas import Daily
+
+
+def compile_query(request: schemas.RequestBase):
+    return get_daily_query(request).compile(dialect=postgresql.dialect())
+
+
+def test_daily_query_dates():
+    request = schemas.RequestBase(stock=["A", "B"], start_date="2022-01-03", end_date="2022-02-01", period=None)
+    compiled = compile_query(request)
+
+    # Full days, end date inclusive, values are bound rather than formatted into the SQL
+    assert compiled.params == {
+        "stock_id_1": ["A", "B"],
+        "timestamp_1": date(2022, 1, 3),
+        "timestamp_2": date(2022, 2, 2),
+    }
+    assert "2022" not in str(compiled)
+    assert str(compiled).endswith("ORDER BY daily.stock_id, daily.timestamp")
+
+
+def test_daily_query_max_period():
+    compiled = compile_query(schemas.RequestBase(stock=["A"], period="max"))
+
+    assert "daily.timestamp >=" not in str(compiled)
+    assert set(compiled.params) == {"stock_id_1", "timestamp_1"}
+
+
+def make_chunks(tickers: list[str], sizes: list[int]) -> list[pd.DataFrame]:
+    """Ticker ordered rows, split into chunks of the given sizes"""
+    data = pd.DataFrame({Daily.stock_id: tickers, Daily.close: range(len(tickers))})
+    bounds = [0, *pd.Series(sizes).cumsum()]
+    assert bounds[-1] == len(data)
+    return [data.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:], strict=True)]
+
+
+@pytest.mark.parametrize(
+    ("tickers", "sizes"),
+    [
+        # Ticker spanning three chunks
+        (["A"] * 2 + ["B"] * 7 + ["C"] * 2, [3, 3, 3, 2]),
+        # Single ticker chunks, and a chunk ending on a ticker boundary
+        (["A"] * 3 + ["B"] * 3 + ["C"], [3, 3, 1]),
+        # All tickers in one chunk
+        (["A", "A", "B", "C", "C"], [5]),
+        # One row per chunk
+        (["A", "A", "B"], [1, 1, 1]),
+    ],
+)
+def test_split_by_ticker(tickers, sizes):
+    frames = list(split_by_ticker(make_chunks(tickers, sizes)))
+
+    assert [frame[Daily.stock_id].unique().tolist() for frame in frames] == [[t] for t in dict.fromkeys(tickers)]
+    assert pd.concat(frames)[Daily.close].tolist() == list(range(len(tickers)))
+    assert all(frame.index.tolist() == list(range(len(frame))) for frame in frames)
+
+
+def test_split_by_ticker_empty():
+    assert list(split_by_ticker([])) == []
@@ -0,0 +1,100 @@
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import delete
+
+from src.time_db import crud, models, update
+from src.time_db.database import engine
+from src.time_db.schemas import Daily, nytz
+
+pytestmark = pytest.mark.db
+
+# Latest stored session of each ticker, WM_NEW has no data
+watermarks = {
+    "WM_A": "2022-08-01",
+    "WM_B": "2022-08-01",
+    "WM_C": "2022-07-29",
+    "WM_UP": "2022-08-03",
+}
+tickers = [*watermarks, "WM_NEW"]
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        # Wednesday evening
+        return cls(2022, 8, 3, 18, tzinfo=nytz.tz)
+
+
+@pytest.fixture()
+def stored():
+    for ticker in tickers:
+        if not crud.get_record_by_filter(models.Stock, {"ticker": ticker}):
+            crud.create_record(models.Stock, {"ticker": ticker})
+
+    def clear():
+        with engine.begin() as connection:
+            connection.execute(delete(models.Daily.__table__).where(models.Daily.stock_id.in_(tickers)))
+
+    clear()
+    rows = [
+        {"stock_id": ticker, "timestamp": timestamp, "open": 1.0, "close": 1.0, "adj_close": 1.0, "volume": 1}
+        for ticker, last in watermarks.items()
+        for timestamp in pd.bdate_range(end=last, periods=3, tz=nytz.tz)
+    ]
+    crud.create_records(models.Daily, rows)
+    yield tickers
+    clear()
+
+
+def test_get_watermarks(stored):
+    latest = update.get_watermarks(stored)
+
+    assert {ticker: timestamp.astimezone(nytz.tz).date() for ticker, timestamp in latest.items()} == {
+        ticker: date.fromisoformat(last) for ticker, last in watermarks.items()
+    }
+
+
+def test_update_daily_requests(stored, monkeypatch):
+    api = MagicMock()
+    api.make_request.return_value = None
+    api.request.return_value = None
+    monkeypatch.setattr(update, "FinanceApi", lambda: api)
+    monkeypatch.setattr(update, "datetime", FixedDatetime)
+
+    update.update_daily(stored, period="1mo")
+
+    requests = {
+        (request.start_date.date(), request.end_date.date()): request.stock
+        for (request,), _ in api.make_request.call_args_list
+    }
+    # Tickers sharing a watermark are requested together from the next day, to the end of today, up to date tickers
+    # are skipped
+    assert requests == {
+        (date(2022, 8, 2), date(2022, 8, 4)): ["WM_A", "WM_B"],
+        (date(2022, 7, 30), date(2022, 8, 4)): ["WM_C"],
+    }
+    assert all(kwargs == {"by_date": True} for _, kwargs in api.make_request.call_args_list)
+    # Tickers with no data are requested over the period
+    api.request.assert_called_once_with(["WM_NEW"], period="1mo")
+
+
+def test_update_daily_invalidates_caches(stored, monkeypatch):
+    new = pd.DataFrame({Daily.stock_id: ["WM_NEW"], Daily.timestamp: [pd.Timestamp("2022-08-03", tz=nytz.tz)]})
+    api = MagicMock()
+    api.make_request.return_value = None
+    api.request.return_value = new.assign(open=1.0, high=1.0, low=1.0, close=1.0, adj_close=1.0, volume=1)
+    insert = MagicMock()
+    monkeypatch.setattr(update, "FinanceApi", lambda: api)
+    monkeypatch.setattr(update, "datetime", FixedDatetime)
+    monkeypatch.setattr(update, "insert_ohlc_data", insert)
+    cache, result_cache = MagicMock(), MagicMock()
+
+    update.update_daily(stored, cache=cache, result_cache=result_cache)
+
+    ((inserted,), _) = cache.invalidate.call_args
+    assert insert.call_args.kwargs["ticker"] == "WM_NEW"
+    assert inserted[Daily.stock_id].tolist() == ["WM_NEW"]
+    result_cache.invalidate.assert_called_once_with(["WM_NEW"])
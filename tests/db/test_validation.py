@@ -0,0 +1,58 @@
+import pandera as pa
+import pytest
+
+from benchmarks.data import fake_daily
+from config import settings
+from src.time_db.schemas import Daily
+from src.time_db.validation import check_input, check_output, validate
+
+schema = Daily.to_schema()
+
+
+@pytest.fixture()
+def invalid_data():
+    data = fake_daily(n_tickers=2, n_days=10)
+    data[Daily.volume] = "none"
+    return data
+
+
+@pytest.mark.parametrize(
+    ("mode", "boundary", "raises"),
+    [
+        ("full", False, True),
+        ("sampled", False, True),
+        ("ingest", False, False),
+        ("ingest", True, True),
+    ],
+)
+def test_validation_modes(monkeypatch, invalid_data, mode, boundary, raises):
+    monkeypatch.setattr(settings, "validation_mode", mode)
+    monkeypatch.setattr(settings, "validation_sample_rows", 5)
+
+    if raises:
+        with pytest.raises(pa.errors.SchemaError):
+            validate(invalid_data, schema, boundary=boundary)
+    else:
+        assert validate(invalid_data, schema, boundary=boundary) is invalid_data
+
+
+def test_decorators(monkeypatch, invalid_data):
+    monkeypatch.setattr(settings, "validation_mode", "ingest")
+
+    @check_output(schema, boundary=True)
+    def download():
+        return invalid_data
+
+    @check_input(schema, "data")
+    def insert(ticker, data):
+        return data
+
+    with pytest.raises(pa.errors.SchemaError):
+        download()
+
+    assert insert("FAKE0", invalid_data) is invalid_data
+
+    monkeypatch.setattr(settings, "validation_mode", "full")
+
+    with pytest.raises(pa.errors.SchemaError):
+        insert("FAKE0", data=invalid_data)
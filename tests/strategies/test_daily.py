@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+from backtesting import Backtest
+from backtesting.test import GOOG
+
+from benchmarks.strategies import legacy
+from strategies import daily
+
+
+@pytest.mark.parametrize(
+    ("strategy", "params"),
+    [
+        (daily.SmaCross, {"n1": 5, "n2": 15}),
+        (daily.MacdSignalCross, {}),
+        (daily.MacdDerivCross, {}),
+        (daily.MacdGradCross, {}),
+        (daily.MacdGradDerivCross, {"threshold": 0.05, "smooth": 3, "buy_sell": 2}),
+        (daily.MacdGradDerivCross, {"threshold": 0.0, "smooth": 0, "buy_sell": 1}),
+    ],
+)
+def test_precomputed_events_match_crossover(strategy, params):
+    data = GOOG.iloc[-500:]
+
+    stats = Backtest(data, strategy, cash=10_000, commission=0.002).run(**params)
+    expected = Backtest(data, legacy[strategy], cash=10_000, commission=0.002).run(**params)
+
+    assert stats["# Trades"] > 0
+    pd.testing.assert_frame_equal(stats["_trades"], expected["_trades"])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies import daily, graph
+from strategies.cache import indicator_cache
+from strategies.graph import Graph, node, source
+from strategies.multi_indicator import MacdDeriv, MultiSignalIndicator, SignalIndicator, Threshold
+
+
+@pytest.fixture()
+def close():
+    rng = np.random.default_rng(42)
+    return pd.Series(100 + rng.normal(size=252).cumsum())
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    indicator_cache.clear()
+
+
+def test_equal_nodes_are_shared():
+    assert graph.macd(source, 12, 26) == graph.macd(source, n_fast=12, n_slow=26)
+    assert graph.ema(graph.macd(source), 9) != graph.ema(graph.macd(source), 5)
+    assert len({graph.ema(source, 12), graph.macd(source).inputs[0]}) == 1
+
+
+def test_nodes_evaluated_once(close):
+    calls = []
+
+    def count(values):
+        calls.append(1)
+        return values * 2
+
+    counted = node(count, source)
+    result = Graph(close, cache=None).evaluate([node(np.add, counted, counted), node(np.negative, counted)])
+
+    assert len(calls) == 1
+    pd.testing.assert_series_equal(result[0], close * 4)
+
+
+def test_multi_signal_indicator_shares_graph(close):
+    msi = MultiSignalIndicator(
+        [
+            SignalIndicator(MacdDeriv(smooth=3), Threshold(value=0.0)),
+            SignalIndicator(MacdDeriv(smooth=10), Threshold(value=0.1)),
+        ]
+    )
+
+    (deriv1, signal1), (deriv2, signal2) = msi(close)
+
+    md = daily.macd_deriv(close)
+    pd.testing.assert_series_equal(deriv1, md.ewm(span=3).mean())
+    pd.testing.assert_series_equal(deriv2, md.ewm(span=10).mean())
+    assert (signal1 == 0.0).all()
+    assert (signal2 == 0.1).all()
+
+    # Both EMAs, the MACD and its derivative are computed once, then each smoothing and signal
+    assert indicator_cache.misses == 8
+
+
+def test_results_cached_across_graphs(close):
+    nodes = SignalIndicator(MacdDeriv(), Threshold()).nodes(source)
+    first = Graph(close).evaluate(nodes)
+    misses = indicator_cache.misses
+
+    second = Graph(close).evaluate(nodes)
+
+    assert indicator_cache.misses == misses
+    for a, b in zip(first, second, strict=True):
+        pd.testing.assert_series_equal(a, b)
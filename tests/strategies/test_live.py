@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.live import LiveStrategy
+
+
+@pytest.fixture()
+def prices():
+    rng = np.random.default_rng(42)
+    index = pd.date_range("2022-08-01 09:30", periods=300, freq="min")
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.0001, size=(300, 3)), axis=0)),
+        index=index,
+        columns=["A", "B", "C"],
+    )
+
+
+def test_evaluate_matches_update(prices):
+    live = LiveStrategy(verbosity=0)
+    expected = [live.update(price) for price in prices["A"]]
+
+    transactions, profit = LiveStrategy(verbosity=0).evaluate(prices["A"])
+
+    assert list(transactions) == expected
+    assert {"buy", "hold", "sell"} <= set(expected)
+    assert profit == live.profit
+
+
+def test_evaluate_batch(prices):
+    live = LiveStrategy(verbosity=0)
+    transactions, profits = live.evaluate_batch(prices)
+
+    assert transactions.shape == prices.shape
+    for ticker in prices:
+        expected, profit = live.evaluate(prices[ticker])
+        np.testing.assert_array_equal(transactions[ticker], expected)
+        assert profits[ticker] == profit
+
+
+def test_main_headless(prices):
+    live = LiveStrategy()
+
+    assert live.main(prices[["A"]].rename(columns={"A": "Adj Close"})) == live.evaluate(prices["A"])[1]
+
+
+def test_import_without_matplotlib():
+    root = Path(__file__).parents[2]
+    code = "import sys, strategies.live; assert 'matplotlib' not in sys.modules"
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=root, env=env)  # noqa: S603
+
+
+def test_plot_returns_figure(prices):
+    pytest.importorskip("matplotlib").use("Agg")
+    plt = pytest.importorskip("matplotlib.pyplot")
+    live = LiveStrategy()
+    data = prices[["A"]].rename(columns={"A": "Adj Close"})
+
+    fig = live.plot(data.assign(Transaction=live.evaluate(data["Adj Close"])[0]))
+
+    assert isinstance(fig, plt.Figure)
+    # Price line, buy and sell markers
+    assert len(fig.axes[0].lines) == 1
+    assert len(fig.axes[0].collections) == 2
+    plt.close(fig)
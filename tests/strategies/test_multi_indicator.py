@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtesting import Backtest
+from backtesting.test import GOOG
+
+from strategies import daily
+from strategies.cache import ComputeCache, indicator_cache
+from strategies.multi_indicator import (
+    Macd,
+    MacdDeriv,
+    MacdSignal,
+    MultiIndicatorStrategy,
+    MultiSignalIndicator,
+    SignalIndicator,
+    Threshold,
+)
+
+
+@pytest.fixture()
+def close():
+    rng = np.random.default_rng(42)
+    return pd.Series(100 + rng.normal(size=252).cumsum())
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    indicator_cache.clear()
+
+
+def test_cached_indicators_match(close):
+    pd.testing.assert_series_equal(Macd(n_fast=5, n_slow=20)(close), daily.macd(close, n_fast=5, n_slow=20))
+
+    md = daily.macd(close)
+    expected = md.diff().ewm(span=4).mean()
+    pd.testing.assert_series_equal(MacdDeriv(smooth=4)(close), expected)
+    pd.testing.assert_series_equal(MacdSignal()(md), md.ewm(span=9, adjust=False).mean())
+
+
+def test_repeat_calls_hit_cache(close):
+    si = SignalIndicator(MacdDeriv(), Threshold())
+    first = si(close)
+    misses = indicator_cache.misses
+
+    second = si(close)
+
+    assert indicator_cache.misses == misses
+    for a, b in zip(first, second, strict=True):
+        pd.testing.assert_series_equal(a, b)
+
+
+def test_intermediates_reused(close):
+    MacdDeriv(smooth=3)(close)
+    misses = indicator_cache.misses
+
+    # Only the derivative is recomputed, the MACD and its EMAs are reused
+    MacdDeriv(smooth=5)(close)
+    assert indicator_cache.misses == misses + 1
+
+    Macd(n_fast=12, n_slow=40)(close)
+    assert indicator_cache.misses == misses + 3
+
+
+def test_keys_include_data_and_params(close):
+    assert not Macd()(close).equals(Macd()(close * 2))
+    assert not Threshold(value=0.1)(close).equals(Threshold(value=0.2)(close))
+    assert not Threshold(scale=2, value=0.1)(close).equals(Threshold(value=0.1)(close))
+
+
+def test_results_are_copies(close):
+    result = Macd()(close)
+    result[:] = 0
+
+    assert not (Macd()(close) == 0).all()
+
+
+def test_size_bound(close):
+    cache = ComputeCache(max_bytes=3 * close.nbytes)
+
+    for span in range(5):
+        cache.get(("ema", span), close, lambda x, span=span: x.ewm(span=span + 1).mean())
+
+    assert len(cache.entries) == 2
+    assert cache.size <= cache.max_bytes
+    assert [key[0] for key in cache.entries] == [("ema", 3), ("ema", 4)]
+
+
+class LoopMultiIndicatorStrategy(MultiIndicatorStrategy):
+    """Signals compared in a loop at each bar, as before the signal matrix (at the current bar)"""
+
+    def init(self):
+        super().init()
+        self.prev_signals = np.zeros(len(self.msi.signal_indicators))
+
+    def next(self):
+        super(MultiIndicatorStrategy, self).next()
+
+        index = len(self.data) - 1
+        signals = []
+        for i, s in zip(self.indicators, self.signals, strict=True):
+            signals.append(1 if i[index] > s[index] else -1 if i[index] < -s[index] else 0)
+        signals = np.array(signals)
+
+        if all(signals > 0) and not all(self.prev_signals > 0):
+            self.position.close()
+            self.buy()
+        elif all(signals < 0) and not all(self.prev_signals < 0):
+            self.position.close()
+            self.sell()
+
+        self.prev_signals = signals
+
+
+def test_signal_matrix_matches_loop():
+    msi = MultiSignalIndicator(
+        [
+            SignalIndicator(MacdDeriv(smooth=0), Threshold(value=0.0)),
+            SignalIndicator(MacdDeriv(n_fast=5, n_slow=20, smooth=3), Threshold(value=0.1)),
+        ]
+    )
+
+    stats = Backtest(GOOG, MultiIndicatorStrategy, cash=10_000, commission=0.002).run(msi=msi)
+    expected = Backtest(GOOG, LoopMultiIndicatorStrategy, cash=10_000, commission=0.002).run(msi=msi)
+
+    assert stats["# Trades"] > 0
+    pd.testing.assert_frame_equal(stats["_trades"], expected["_trades"])
+    assert stats["Equity Final [$]"] == expected["Equity Final [$]"]
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtesting.test import GOOG
+
+from strategies import daily
+from strategies.streaming import Atr, Ema, Macd, MacdDeriv, MacdSignal, PctChange, RollingMax, RollingMean, RollingMin
+
+
+def assert_equal(actual, expected):
+    # Exact, streaming indicators must give the same bits as the batch functions
+    np.testing.assert_array_equal(actual, np.asarray(expected, dtype=float))
+
+
+@pytest.fixture(params=["walk", "gaps", "flat"])
+def values(request):
+    rng = np.random.default_rng(42)
+    values = 100 + rng.normal(size=500).cumsum()
+
+    if request.param == "gaps":
+        values[:3] = np.nan
+        values[rng.integers(0, len(values), 30)] = np.nan
+    elif request.param == "flat":
+        values[100:130] = 5.0
+        values[200:260] = -1.5
+        values = np.round(values, 1)
+
+    return values
+
+
+@pytest.mark.parametrize("span", [1, 2, 9, 12.5, 26])
+def test_ema(values, span):
+    assert_equal(Ema(span).stream(values), pd.Series(values).ewm(span=span, adjust=False).mean())
+
+
+def test_pct_change(values):
+    series = pd.Series(values)
+    assert_equal(PctChange().stream(values), 100 * series.diff() / series.shift())
+
+
+def test_macd(values):
+    assert_equal(Macd(n_fast=5, n_slow=20).stream(values), daily.macd(values, n_fast=5, n_slow=20))
+    assert_equal(MacdDeriv().stream(values), daily.macd_deriv(values))
+
+    md, signal = daily.macd_signal(values, smooth=4)
+    out = MacdSignal(smooth=4).stream(values)
+    assert_equal(out[:, 0], md)
+    assert_equal(out[:, 1], signal)
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 100])
+def test_rolling(values, n):
+    rolling = pd.Series(values).rolling(n)
+
+    assert_equal(RollingMax(n).stream(values), rolling.max())
+    assert_equal(RollingMin(n).stream(values), rolling.min())
+    assert_equal(RollingMean(n).stream(values), rolling.mean())
+
+
+def test_atr():
+    high, low, close = GOOG.High.to_numpy(), GOOG.Low.to_numpy(), GOOG.Close.to_numpy()
+    prev_close = pd.Series(close).shift(1)
+    true_range = np.max([high - low, (prev_close - high).abs(), (prev_close - low).abs()], axis=0)
+
+    assert_equal(Atr(14).stream(high, low, close), pd.Series(true_range).rolling(14).mean())
+
+
+def test_update_and_reset(values):
+    ema = Ema(9)
+    expected = ema.stream(values)
+
+    ema.reset()
+    assert_equal([ema.update(value) for value in values], expected)
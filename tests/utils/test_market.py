@@ -0,0 +1,67 @@
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pandas_market_calendars as mcal
+import pytest
+
+from utils.market import MarketCalendar, get_missing_ranges
+
+expected = pd.bdate_range("2022-08-01", "2022-08-31", tz="America/New_York")
+
+
+def test_no_missing_ranges():
+    assert get_missing_ranges(expected, expected) == []
+
+
+def test_all_missing():
+    assert get_missing_ranges(expected, []) == [(expected[0], expected[-1])]
+
+
+def test_missing_ranges():
+    # Drop first two sessions, one in the middle (over a weekend boundary) and the last three
+    present = expected.delete([0, 1, 4, 5, -3, -2, -1])
+
+    ranges = get_missing_ranges(expected, present)
+
+    assert ranges == [
+        (expected[0], expected[1]),
+        (expected[4], expected[5]),
+        (expected[-3], expected[-1]),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "frequency"),
+    [
+        (datetime(2022, 7, 3, tzinfo=timezone.utc), datetime(2022, 8, 3, tzinfo=timezone.utc), "1d"),
+        # Half day and holiday
+        (datetime(2022, 11, 23, 20, tzinfo=timezone.utc), datetime(2022, 11, 28, tzinfo=timezone.utc), "1m"),
+        (datetime(2022, 12, 23, tzinfo=timezone.utc), datetime(2022, 12, 27, tzinfo=timezone.utc), "5m"),
+        # Outside of the initial grid range
+        (datetime(2021, 12, 20, tzinfo=timezone.utc), datetime(2022, 1, 10, tzinfo=timezone.utc), "30m"),
+    ],
+)
+def test_calendar_indices(tmp_path, start, end, frequency):
+    calendar = mcal.get_calendar("NYSE")
+
+    if frequency.endswith("m"):
+        expected = mcal.date_range(calendar.schedule(start, end, tz=calendar.tz), frequency=frequency)
+    else:
+        expected = calendar.schedule(start, end, tz=None).index.tz_localize(calendar.tz)
+
+    market_calendar = MarketCalendar("NYSE", start="2022-01-01", end="2022-12-31", path=tmp_path)
+    assert market_calendar.indices(start, end, frequency).equals(expected)
+
+    # Grids saved by the first calendar are loaded by the second
+    assert list(tmp_path.iterdir())
+    # Grids are written through temporary files, which are renamed into place
+    assert all(path.suffix == ".npy" for path in tmp_path.iterdir())
+    reloaded = MarketCalendar("NYSE", start=market_calendar.start, end=market_calendar.end, path=tmp_path)
+    assert reloaded.indices(start, end, frequency).equals(expected)
+
+
+def test_calendar_no_sessions():
+    market_calendar = MarketCalendar("NYSE", start="2022-01-01", end="2022-12-31")
+
+    # Christmas weekend and holiday
+    assert market_calendar.indices(date(2022, 12, 24), date(2022, 12, 26), "1m").empty
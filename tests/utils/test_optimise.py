@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hyperopt import Trials, fmin, hp, tpe
+
+from utils.optimise import SuccessiveHalving, get_best, opt, parallel_fmin
+
+space = {
+    "x": hp.uniform("x", -5, 5),
+    "choice": hp.choice("choice", ["a", "b"]),
+}
+
+
+def objective(params):
+    return (params["x"] - 1) ** 2 + (params["choice"] == "b")
+
+
+def test_reproducible():
+    trials = [Trials(), Trials()]
+    best = [parallel_fmin(objective, space, max_evals=25, n_jobs=2, seed=1, trials=t) for t in trials]
+
+    assert best[0] == best[1]
+    assert trials[0].losses() == trials[1].losses()
+    assert len(trials[0].trials) == 25
+
+
+def test_opt_parallel_fmin_options():
+    trials = Trials()
+    best = opt(objective, space, n_jobs=2, seed=1, max_evals=10, trials=trials, show_progressbar=False)
+
+    assert best == parallel_fmin(objective, space, max_evals=10, n_jobs=2, seed=1, show_progressbar=False)
+    assert len(trials.trials) == 10
+
+
+def test_matches_fmin():
+    trials = Trials()
+    parallel_fmin(objective, space, max_evals=25, n_jobs=1, seed=3, trials=trials)
+
+    expected = Trials()
+    fmin(
+        objective,
+        space,
+        algo=tpe.suggest,
+        max_evals=25,
+        trials=expected,
+        rstate=np.random.default_rng(3),
+        show_progressbar=False,
+    )
+
+    assert trials.losses() == expected.losses()
+
+
+def score_items(params, items):
+    # Sharpe of each item peaks at x = 1, items differ by a constant offset
+    return pd.DataFrame({"Sharpe Ratio": [-((params["x"] - 1) ** 2) + item / 10 for item in items]}, index=items)
+
+
+def mean_loss(stats):
+    return -stats["Sharpe Ratio"].mean()
+
+
+def test_successive_halving_rungs():
+    objective = SuccessiveHalving(score_items, mean_loss, items=list(range(40)), min_items=5, eta=2, seed=0)
+
+    assert objective.rungs == [5, 10, 20, 40]
+    assert sorted(objective.items) == list(range(40))
+
+    result = objective({"x": 1.0})
+    assert result["n_items"] == 40
+    assert not result["pruned"]
+    assert result["loss"] == pytest.approx(-np.mean(range(40)) / 10)
+
+
+def test_successive_halving_prunes():
+    objective = SuccessiveHalving(score_items, mean_loss, items=list(range(40)), min_trials=3, seed=0)
+
+    for x in [1.0, 1.1, 0.9]:
+        assert not objective({"x": x})["pruned"]
+
+    result = objective({"x": 4.0})
+    assert result["pruned"]
+    assert result["n_items"] == 5
+    assert result["loss"] == mean_loss(score_items({"x": 4.0}, objective.items[:5]))
+
+    assert not objective({"x": 1.0})["pruned"]
+
+
+def test_successive_halving_missing_losses():
+    def score_or_missing(params, items):
+        if params["x"] is None:
+            return pd.DataFrame({"Sharpe Ratio": np.nan}, index=items)
+        return score_items(params, items)
+
+    objective = SuccessiveHalving(score_or_missing, mean_loss, items=list(range(40)), min_trials=3, seed=0)
+
+    # Missing losses don't count towards min_trials, nor rank the next trials
+    for _ in range(3):
+        assert not objective({"x": None})["pruned"]
+
+    for x in [1.0, 0.5, 1.5]:
+        result = objective({"x": x})
+        assert not result["pruned"]
+        assert result["n_items"] == 40
+
+    # Once enough losses are known, missing losses rank worst
+    assert objective({"x": None})["pruned"]
+    assert objective({"x": 4.0})["pruned"]
+    assert not objective({"x": 1.0})["pruned"]
+
+
+def test_successive_halving_fmin():
+    objective = SuccessiveHalving(score_items, mean_loss, items=list(range(20)), seed=0)
+    trials = Trials()
+
+    fmin(
+        objective,
+        {"x": hp.uniform("x", -5, 5)},
+        algo=tpe.suggest,
+        max_evals=40,
+        trials=trials,
+        rstate=np.random.default_rng(0),
+        show_progressbar=False,
+    )
+
+    results = trials.results
+    assert any(r["pruned"] for r in results)
+    assert all(r["n_items"] == 20 for r in results if not r["pruned"])
+    # Best of the trials scored on all items, partial losses are not comparable
+    full = min((t for t in trials.trials if not t["result"]["pruned"]), key=lambda t: t["result"]["loss"])
+    best = get_best(trials)
+    assert best == {"x": full["misc"]["vals"]["x"][0]}
+    assert abs(best["x"] - 1) < 0.5
@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
 
+from src.db.cache import ArrowCache
 from src.time_db.update import update_daily
 
 if __name__ == "__main__":
     print("Updating database:", datetime.now(tz=timezone.utc))
-    update_daily()
+    update_daily(cache=ArrowCache())
@@ -1,10 +1,10 @@
 from datetime import datetime, timezone
-from time import sleep
 
 import pandas as pd
 from pandas_datareader import data
 
 from config import yahoo_api_settings
+from src.api import rate
 from src.db.main import DatabaseApi
 from utils.gen import batch
 
@@ -13,9 +13,8 @@ from utils.gen import batch
 def get_stock_metadata(tickers: list[str]) -> pd.DataFrame:
     try:
         print(f"Retreiving metadata for ticker: {tickers}")
-        metadata = data.get_quote_yahoo(tickers)
-        sleep(yahoo_api_settings.poll_frequency)
-        return metadata
+        rate.rate_limiter.acquire()
+        return data.get_quote_yahoo(tickers)
 
     except KeyError as e:
         print(f"Failed: {repr(e)}")
@@ -1,8 +1,164 @@
+import tempfile
+from datetime import datetime
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import pandas_market_calendars as mcal
 
 
+class MarketCalendar:
+    """
+    Trading calendar of a market, computing the session grid and intraday grids once over a fixed date range and
+    answering requests for any range within it by binary search.
+
+    Grids are kept as int64 (nanosecond) arrays: session dates, and for each intraday frequency the bar timestamps
+    (UTC) with the offset of the first bar of each session. They are optionally saved to disk, so they are only ever
+    built once per market, frequency and date range.
+    """
+
+    def __init__(
+        self,
+        market: str = "NYSE",
+        start: str | datetime = "2000-01-01",
+        end: str | datetime | None = None,
+        path: Path | None = None,
+    ):
+        """
+        :param market: market calendar name, see pandas_market_calendars
+        :param start: first date of the grids
+        :param end: last date of the grids, defaults to the end of next year
+        :param path: optional directory to save and load grids
+        """
+        self.market = market
+        self.calendar = mcal.get_calendar(market)
+        self.tz = self.calendar.tz
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize() if end else pd.Timestamp(datetime.now(tz=self.tz).year + 1, 12, 31)
+        self.path = path
+        self._grids: dict[str, np.ndarray] = {}
+        self._schedule: pd.DataFrame | None = None
+
+    def indices(self, start_date, end_date, frequency: str = "1d") -> pd.DatetimeIndex:
+        """
+        Get the expected timestamps between two dates (inclusive, time and timezone are ignored), matching
+        calendar.schedule and mcal.date_range. Non intraday frequencies give session dates at midnight in market time,
+        intraday frequencies give bar close timestamps in market time.
+        """
+        start = self.start if start_date is None else pd.Timestamp(start_date).tz_localize(None).normalize()
+        end = pd.Timestamp(end_date).tz_localize(None).normalize()
+
+        if start > end:
+            raise ValueError("start_date must be before or equal to end_date.")
+
+        self._cover(start, end)
+
+        sessions = self._get_grid("sessions")
+        first, last = np.searchsorted(sessions, [start.value, end.value + 1])
+
+        if not frequency.endswith("m"):
+            return pd.DatetimeIndex(sessions[first:last]).tz_localize(self.tz)
+
+        offsets = self._get_grid(f"{frequency}_offsets")
+        timestamps = self._get_grid(frequency)[offsets[first] : offsets[last]]
+        return pd.DatetimeIndex(timestamps).tz_localize("UTC").tz_convert(self.tz)
+
+    def _cover(self, start: pd.Timestamp, end: pd.Timestamp):
+        """Extend the grid date range to cover start and end, grids are rebuilt on next use if it changes"""
+        if start < self.start or end > self.end:
+            self.start, self.end = min(start, self.start), max(end, self.end)
+            self._grids.clear()
+            self._schedule = None
+
+    def _get_grid(self, name: str) -> np.ndarray:
+        if name not in self._grids:
+            path = self._grid_path(name)
+
+            if path is not None and path.exists():
+                self._grids[name] = np.load(path)
+            else:
+                self._build(name)
+                self._save()
+
+        return self._grids[name]
+
+    def _build(self, name: str):
+        if self._schedule is None:
+            self._schedule = self.calendar.schedule(start_date=self.start, end_date=self.end, tz=None)
+
+        schedule = self._schedule
+        self._grids["sessions"] = schedule.index.asi8
+
+        if name != "sessions":
+            frequency = name.removesuffix("_offsets")
+            timestamps = mcal.date_range(schedule, frequency=frequency)
+
+            # Bars belong to the session they close in, sessions are in ascending order
+            closes = schedule["market_close"].to_numpy().astype(np.int64)
+            self._grids[frequency] = timestamps.asi8
+            self._grids[f"{frequency}_offsets"] = np.concatenate(
+                [[0], np.searchsorted(self._grids[frequency], closes, side="right")]
+            )
+
+    def _save(self):
+        for name, grid in self._grids.items():
+            path = self._grid_path(name)
+
+            if path is not None and not path.exists():
+                save_atomic(path, grid)
+
+    def _grid_path(self, name: str) -> Path | None:
+        if self.path is None:
+            return None
+
+        return self.path / f"{self.market}_{self.start:%Y%m%d}_{self.end:%Y%m%d}_{name}.npy"
+
+
+def save_atomic(path: Path, array: np.ndarray):
+    """
+    Save an array to a .npy file through a temporary file in the same directory, so concurrent readers never load a
+    partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.stem}", suffix=".tmp", delete=False) as file:
+        try:
+            np.save(file, array)
+        except BaseException:
+            Path(file.name).unlink()
+            raise
+
+    Path(file.name).replace(path)
+
+
+@cache
+def get_calendar(market: str = "NYSE", path: Path | None = None) -> MarketCalendar:
+    """
+    Get the shared calendar of a market, so grids are built once per process.
+    """
+    return MarketCalendar(market, path=path)
+
+
 def get_market_tz(market: str = "NYSE"):
     """
     Get timezone of market
     """
-    return mcal.get_calendar(market).tz
+    return get_calendar(market).tz
+
+
+def get_missing_ranges(expected: pd.DatetimeIndex, present) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Collapse expected calendar timestamps that are absent from present into minimal (first, last) ranges.
+    Consecutive missing sessions form a single inclusive range, regardless of weekends or holidays between them.
+    """
+    missing = ~expected.isin(present)
+
+    if not missing.any():
+        return []
+
+    # Range boundaries are where the missing flag switches on or off
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], missing.astype(np.int8), [0]])))
+    starts, stops = edges[::2], edges[1::2] - 1
+
+    return [(expected[start], expected[stop]) for start, stop in zip(starts, stops, strict=True)]
@@ -0,0 +1,231 @@
+import math
+import os
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from hyperopt import STATUS_OK, Trials, base, fmin, pyll, tpe
+from hyperopt.utils import coarse_utcnow
+from tqdm import tqdm
+
+# Objective of the current worker process, set by the pool initializer
+_objective: Callable[[Any], Any] | None = None
+
+
+def _set_objective(fn: Callable[[Any], Any]):
+    global _objective
+    _objective = fn
+
+
+def _evaluate(params: Any) -> Any:
+    return _objective(params)
+
+
+def parallel_fmin(
+    fn: Callable[[Any], Any],
+    space: Any,
+    max_evals: int,
+    n_jobs: int = 2,
+    algo: Callable = tpe.suggest,
+    seed: int | None = None,
+    trials: Trials | None = None,
+    ordered: bool = True,
+    show_progressbar: bool = True,
+) -> dict[str, Any]:
+    """
+    Minimise a function with hyperopt, evaluating several suggestions at once in a local process pool.
+
+    Up to n_jobs trials are evaluated at a time, each new suggestion is made from all results received so far, so the
+    search behaves like fmin with a lag of n_jobs - 1 results.
+
+    Parameters
+    ----------
+    fn: Picklable objective, taking parameters sampled from the space and returning a loss or a result dictionary (see
+        fmin). It is sent to each worker once, so data bound to it (e.g. with partial) is not copied per trial.
+    space: Hyperopt search space.
+    max_evals: Number of trials to evaluate.
+    n_jobs: Number of worker processes, and of trials evaluated at once, -1 for one per CPU.
+    algo: Suggestion algorithm, e.g. tpe.suggest or rand.suggest.
+    seed: Random seed of the suggestion algorithm.
+    trials: Optional trials object to record trials in, and to continue a previous search from.
+    ordered: Receive results in the order trials were suggested, so the trials are reproducible for a given seed and
+        n_jobs. Otherwise results are received as soon as they finish, keeping all workers busy.
+    show_progressbar: Show a progress bar of received trials, as fmin.
+
+    Returns
+    -------
+    Best parameters found, in the same format as fmin (see space_eval).
+    """
+    if n_jobs < 0:
+        n_jobs = os.cpu_count()
+
+    if trials is None:
+        trials = Trials()
+
+    domain = base.Domain(fn, space)
+    rstate = np.random.default_rng(seed)
+    pending: deque[tuple[Future, dict]] = deque()
+
+    def submit(pool: ProcessPoolExecutor):
+        trials.refresh()
+        new_ids = trials.new_trial_ids(1)
+        (doc,) = algo(new_ids, domain, trials, rstate.integers(2**31 - 1))
+
+        doc["state"] = base.JOB_STATE_RUNNING
+        doc["book_time"] = coarse_utcnow()
+        trials.insert_trial_docs([doc])
+        # Inserted documents are copies, keep the stored one to update
+        doc = trials._dynamic_trials[-1]
+
+        params = pyll.rec_eval(domain.expr, memo=domain.memo_from_config(base.spec_from_misc(doc["misc"])))
+        pending.append((pool.submit(_evaluate, params), doc))
+
+    def receive(future: Future, doc: dict):
+        doc["result"] = get_result(future.result())
+        doc["state"] = base.JOB_STATE_DONE
+        doc["refresh_time"] = coarse_utcnow()
+        progress.update()
+
+    n_submitted = 0
+    with (
+        ProcessPoolExecutor(max_workers=n_jobs, initializer=_set_objective, initargs=(fn,)) as pool,
+        tqdm(total=max_evals, disable=not show_progressbar) as progress,
+    ):
+        while n_submitted < max_evals or pending:
+            while n_submitted < max_evals and len(pending) < n_jobs:
+                submit(pool)
+                n_submitted += 1
+
+            if ordered:
+                receive(*pending.popleft())
+            else:
+                done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+                for item in [item for item in pending if item[0] in done]:
+                    pending.remove(item)
+                    receive(*item)
+
+    trials.refresh()
+    return trials.argmin
+
+
+def opt(obj_func, param_space: dict[str, Any], n_jobs: int = 1, seed: int | None = None, **kwargs):
+    """
+    Minimise an objective with TPE, evaluating n_jobs trials at a time in worker processes when not 1 (see
+    parallel_fmin). Runs are reproducible for a given seed (and n_jobs). Keyword arguments are options of fmin, parallel
+    runs take those shared with parallel_fmin (e.g. max_evals, trials and show_progressbar).
+    """
+    if n_jobs != 1:
+        return parallel_fmin(obj_func, param_space, n_jobs=n_jobs, seed=seed, **kwargs)
+
+    return fmin(obj_func, param_space, algo=tpe.suggest, rstate=np.random.default_rng(seed), **kwargs)
+
+
+def get_result(rval: Any) -> dict[str, Any]:
+    """
+    Normalise an objective return value to a hyperopt result dictionary, as done by Domain.evaluate.
+    """
+    if isinstance(rval, float | int | np.number):
+        return {"loss": float(rval), "status": STATUS_OK}
+
+    result = dict(rval)
+    if result["status"] not in base.STATUS_STRINGS:
+        raise base.InvalidResultStatus(result)
+
+    if result["status"] == STATUS_OK:
+        result["loss"] = float(result["loss"])
+
+    return result
+
+
+class SuccessiveHalving:
+    """
+    Objective scoring parameters on growing random subsets of items (e.g. tickers), pruning trials early.
+
+    Items are scored in rungs of min_items, min_items * eta, ... and finally all items, each rung only evaluating the
+    items added to it. A trial is pruned when its loss on a rung is worse than the 1 / eta quantile of the losses of
+    previous trials on that rung, so roughly 1 / eta of trials reach each next rung. Pruned trials are reported with
+    their partial loss, which is not comparable to losses on all items, so select the best parameters with get_best.
+
+    Rung losses are kept by the instance, with parallel_fmin each worker process keeps its own.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[Any, list], pd.DataFrame],
+        loss: Callable[[pd.DataFrame], float],
+        items: Sequence,
+        min_items: int = 5,
+        eta: int = 2,
+        min_trials: int = 5,
+        seed: int | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        evaluate: Picklable function taking parameters and a list of items, returning stats with one row per item.
+        loss: Function of the stats of any set of items, lower is better.
+        items: Items to score parameters on, in random order at each rung (the same for all trials).
+        min_items: Number of items in the first rung.
+        eta: Growth factor of the rungs, and inverse of the fraction of trials kept at each rung.
+        min_trials: Number of trials scored on a rung before trials are pruned on it.
+        seed: Random seed of the item order.
+        """
+        order = np.random.default_rng(seed).permutation(len(items))
+        self.items = [items[i] for i in order]
+        self.evaluate = evaluate
+        self.loss = loss
+        self.eta = eta
+        self.min_trials = min_trials
+
+        n_rungs = max(math.ceil(math.log(len(self.items) / min_items, eta)), 0) + 1 if self.items else 1
+        self.rungs = [min(min_items * eta**i, len(self.items)) for i in range(n_rungs)]
+        self.history: list[list[float]] = [[] for _ in self.rungs]
+
+    def __call__(self, params: Any) -> dict[str, Any]:
+        stats, n_items, pruned = [], 0, False
+
+        for size, history in zip(self.rungs, self.history, strict=True):
+            stats.append(self.evaluate(params, self.items[n_items:size]))
+            n_items = size
+            loss = self.loss(pd.concat(stats))
+
+            pruned = n_items < len(self.items) and self.is_pruned(loss, history)
+            history.append(loss)
+
+            if pruned:
+                break
+
+        return {"loss": float(loss), "status": STATUS_OK, "pruned": bool(pruned), "n_items": n_items}
+
+    def is_pruned(self, loss: float, history: list[float]) -> bool:
+        """
+        Whether a loss on a rung is worse than the 1 / eta best losses of previous trials on that rung, once at least
+        min_trials of them have a loss. Missing losses (e.g. no trades) rank worst.
+        """
+        scored = np.asarray(history, dtype=float)
+        scored = scored[~np.isnan(scored)]
+
+        if len(scored) < self.min_trials:
+            return False
+
+        n_better = len(scored) if np.isnan(loss) else np.sum(scored < loss)
+        return bool(n_better > len(scored) / self.eta)
+
+
+def get_best(trials: Trials) -> dict[str, Any]:
+    """
+    Best parameters of the trials that were scored in full (not pruned by SuccessiveHalving), in the same format as
+    fmin.
+    """
+    scored = [
+        trial
+        for trial in trials.trials
+        if trial["result"]["status"] == STATUS_OK
+        and not trial["result"].get("pruned", False)
+        and not np.isnan(trial["result"]["loss"])
+    ]
+    best = min(scored, key=lambda trial: trial["result"]["loss"])
+    return {name: values[0] for name, values in best["misc"]["vals"].items() if values}